@@ -1,10 +1,13 @@
-import requests
 import uuid
 from config import Config
+from services.http_client import ProviderHTTP
+from services.token_cache import TokenCache
 
 
 class OrangeMoneyAPI:
 
+    TOKEN_URL = "https://api.orange.com/oauth/v3/token"
+
     def __init__(self):
         self.api_key = Config.OM_API_KEY
         self.client_id = Config.OM_CLIENT_ID
@@ -17,23 +20,27 @@ class OrangeMoneyAPI:
 
     # 🔹 1. Obtenir un token OAuth 2.0
     def get_token(self):
-        url = "https://api.orange.com/oauth/v3/token"
+        # Jeton partagé entre requêtes et workers, renouvelé avant expiration
+        return TokenCache.get(self._token_key(), self._request_token)
+
+    def _token_key(self):
+        return f"{self.TOKEN_URL}|{self.client_id}"
 
-        response = requests.post(
-            url,
+    def _request_token(self):
+        response = ProviderHTTP.post(
+            self.TOKEN_URL,
             data={"grant_type": "client_credentials"},
-            auth=(self.client_id, self.client_secret)
+            auth=(self.client_id, self.client_secret),
+            idempotent=True
         )
 
         if response.status_code != 200:
             raise Exception(f"Erreur Token Orange : {response.text}")
 
-        return response.json()["access_token"]
+        return response.json()
 
     # 🔹 2. Initier un paiement
     def init_payment(self, amount, phone_number, return_url):
-        token = self.get_token()
-
         reference = str(uuid.uuid4())[:12]
 
         payload = {
@@ -45,14 +52,20 @@ class OrangeMoneyAPI:
         }
 
         headers = {
-            "Authorization": f"Bearer {token}",
             "X-Orange-Money-Phone": phone_number,
             "Content-Type": "application/json"
         }
 
         url = f"{self.base_url}/init"
 
-        response = requests.post(url, json=payload, headers=headers)
+        # Jeton révoqué (401) : renouvelé puis un seul rejeu
+        response = TokenCache.authorized(
+            self._token_key(),
+            self.get_token,
+            lambda token: ProviderHTTP.post(
+                url, json=payload, headers={**headers, "Authorization": f"Bearer {token}"}
+            )
+        )
 
         if response.status_code != 200:
             print("Erreur init_payment OM :", response.text)
@@ -65,15 +78,13 @@ class OrangeMoneyAPI:
 
     # 🔹 3. Vérifier le statut du paiement
     def check_payment_status(self, reference):
-        token = self.get_token()
-
         url = f"{self.base_url}/paymentStatus/{reference}"
 
-        headers = {
-            "Authorization": f"Bearer {token}"
-        }
-
-        response = requests.get(url, headers=headers)
+        response = TokenCache.authorized(
+            self._token_key(),
+            self.get_token,
+            lambda token: ProviderHTTP.get(url, headers={"Authorization": f"Bearer {token}"})
+        )
 
         if response.status_code != 200:
             return {"success": False, "error": response.text}
@@ -18,12 +18,15 @@ from datetime import timedelta
 from extensions import limiter
 from routes.admin_transactions import admin_tx
 from routes.admin_actions_routes import admin_actions_bp
+from routes.admin_realtime import admin_realtime
 import models 
 from routes.support import support
 from paiements.routes import paiements_bp
 from webhook import webhook_bp
 from routes.legal import legal
 from routes.data import data_bp
+from services.stat_counters import StatCounters
+from services.query_budget import QueryInspector
 
 
 
@@ -105,6 +108,8 @@ def test():
         
 app.config.from_object(Config)
 db.init_app(app)              # Initialisation de la base de données
+StatCounters.install()        # Compteurs par statut maintenus à chaque flush
+QueryInspector.install(app)   # Comptage SQL / détection N+1 par requête
 
 
 '''
@@ -230,6 +235,7 @@ app.register_blueprint(paiement)
 app.register_blueprint(convert)
 app.register_blueprint(admin_tx)
 app.register_blueprint(admin_actions_bp)
+app.register_blueprint(admin_realtime)
 app.register_blueprint(support)
 app.register_blueprint(paiements_bp, url_prefix="/paiements")
 app.register_blueprint(webhook_bp)
@@ -110,6 +110,112 @@ class Config:
         "200 per day;50 per hour"
     )
 
+    # --------------------------------------------------
+    # COMPTES SYSTÈME (RÉPARTITION)
+    # --------------------------------------------------
+    ACCOUNT_CACHE_REFRESH_SECONDS = int(os.getenv("ACCOUNT_CACHE_REFRESH_SECONDS", "5"))
+    ACCOUNT_CACHE_MAX_AGE = int(os.getenv("ACCOUNT_CACHE_MAX_AGE", "30"))
+
+    # --------------------------------------------------
+    # TAUX DE CHANGE (CACHE)
+    # --------------------------------------------------
+    RATE_CACHE_REFRESH_SECONDS = int(os.getenv("RATE_CACHE_REFRESH_SECONDS", "5"))
+    QUOTE_BATCH_MAX_ITEMS = int(os.getenv("QUOTE_BATCH_MAX_ITEMS", "50"))
+    QUOTE_TOKEN_TTL_SECONDS = int(os.getenv("QUOTE_TOKEN_TTL_SECONDS", "900"))
+
+    # Processus `stream` (gunicorn_stream.conf.py) déployé et routé par le
+    # proxy : les pages ouvrent les flux SSE, sinon polling uniquement
+    SSE_STREAMS_ENABLED = os.getenv("SSE_STREAMS_ENABLED", "0") == "1"
+
+    # Flux SSE des taux (/convert/api/taux/stream)
+    RATE_STREAM_POLL_SECONDS = float(os.getenv("RATE_STREAM_POLL_SECONDS", "2"))
+    RATE_STREAM_MAX_AGE = int(os.getenv("RATE_STREAM_MAX_AGE", "300"))
+    # Connexions simultanées par worker ; 0 = flux désactivé (polling ETag)
+    RATE_STREAM_MAX_CLIENTS = int(os.getenv("RATE_STREAM_MAX_CLIENTS", "0"))
+
+    # Cache HTTP de GET /convert/api/taux
+    RATE_HTTP_MAX_AGE = int(os.getenv("RATE_HTTP_MAX_AGE", "30"))
+    RATE_HTTP_STALE_WHILE_REVALIDATE = int(os.getenv("RATE_HTTP_STALE_WHILE_REVALIDATE", "300"))
+
+    # --------------------------------------------------
+    # TABLEAU DE BORD ADMIN
+    # --------------------------------------------------
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+
+    # Flux SSE du tableau de bord (/admin/realtime/stream)
+    ADMIN_STREAM_POLL_SECONDS = float(os.getenv("ADMIN_STREAM_POLL_SECONDS", "2"))
+    ADMIN_STREAM_MAX_AGE = int(os.getenv("ADMIN_STREAM_MAX_AGE", "300"))
+    # Connexions simultanées par worker ; 0 = flux désactivé (polling /stats)
+    ADMIN_STREAM_MAX_CLIENTS = int(os.getenv("ADMIN_STREAM_MAX_CLIENTS", "0"))
+
+    # Agrégats temporels (run_rollups.py)
+    ROLLUP_INTERVAL_SECONDS = int(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+    # Fenêtre recalculée derrière le watermark (changements de statut tardifs)
+    ROLLUP_LATE_WINDOW_HOURS = int(os.getenv("ROLLUP_LATE_WINDOW_HOURS", "24"))
+
+    # --------------------------------------------------
+    # EXPORTS EN ARRIÈRE-PLAN (run_export_worker.py)
+    # --------------------------------------------------
+    EXPORT_DIR = os.getenv("EXPORT_DIR")  # défaut : instance/exports
+    EXPORT_POLL_SECONDS = int(os.getenv("EXPORT_POLL_SECONDS", "5"))
+    # Une demande identique plus récente que ce délai réutilise le fichier
+    EXPORT_REUSE_SECONDS = int(os.getenv("EXPORT_REUSE_SECONDS", "3600"))
+    EXPORT_RETENTION_HOURS = int(os.getenv("EXPORT_RETENTION_HOURS", "72"))
+    # Job `en_cours` sans progression depuis ce délai : worker considéré mort
+    EXPORT_STALE_SECONDS = int(os.getenv("EXPORT_STALE_SECONDS", "900"))
+    EXPORT_MAX_ATTEMPTS = int(os.getenv("EXPORT_MAX_ATTEMPTS", "2"))
+    # Export Parquet analytique (run_parquet_export.py) — défaut : instance/parquet
+    PARQUET_EXPORT_DIR = os.getenv("PARQUET_EXPORT_DIR")
+
+    # --------------------------------------------------
+    # INSTRUMENTATION SQL (services/query_budget.py)
+    # --------------------------------------------------
+    QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", "1" if DEBUG else "0") == "1"
+    QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "50"))
+    # Même instruction (aux paramètres près) répétée N fois : N+1 probable
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+    # Tests : un dépassement de budget lève QueryBudgetExceeded
+    QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+
+    # --------------------------------------------------
+    # COMPTAGES APPROCHÉS (services/approx_count.py)
+    # --------------------------------------------------
+    # En dessous de ce nombre de lignes, on compte exactement
+    APPROX_COUNT_EXACT_LIMIT = int(os.getenv("APPROX_COUNT_EXACT_LIMIT", "1000"))
+    APPROX_COUNT_TTL = int(os.getenv("APPROX_COUNT_TTL", "60"))
+
+    # --------------------------------------------------
+    # ÉTAT PARTAGÉ ENTRE WORKERS (services/local_store.py)
+    # --------------------------------------------------
+    # Fichier SQLite local — défaut : instance/local_store.sqlite
+    LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH")
+    # Jetons OAuth renouvelés ce délai avant leur expiration
+    TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "60"))
+
+    # --------------------------------------------------
+    # APPELS FOURNISSEURS (services/http_client.py)
+    # --------------------------------------------------
+    PROVIDER_HTTP_POOL_SIZE = int(os.getenv("PROVIDER_HTTP_POOL_SIZE", "10"))
+    PROVIDER_HTTP_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_HTTP_CONNECT_TIMEOUT", "3.05"))
+    PROVIDER_HTTP_READ_TIMEOUT = float(os.getenv("PROVIDER_HTTP_READ_TIMEOUT", "10"))
+    # Nouvelles tentatives (appels idempotents uniquement)
+    PROVIDER_HTTP_RETRIES = int(os.getenv("PROVIDER_HTTP_RETRIES", "2"))
+    PROVIDER_HTTP_BACKOFF = float(os.getenv("PROVIDER_HTTP_BACKOFF", "0.3"))
+    PROVIDER_HTTP_BACKOFF_MAX = float(os.getenv("PROVIDER_HTTP_BACKOFF_MAX", "3"))
+
+    # Initiation sans issue connue (services/payment_service.py) :
+    # compensée sans callback après ce délai (run_payment_sweep.py)
+    PAYMENT_UNCERTAIN_EXPIRY_MINUTES = int(os.getenv("PAYMENT_UNCERTAIN_EXPIRY_MINUTES", "60"))
+    PAYMENT_SWEEP_INTERVAL_SECONDS = int(os.getenv("PAYMENT_SWEEP_INTERVAL_SECONDS", "300"))
+
+    # Disjoncteur par fournisseur (services/provider_health.py)
+    PROVIDER_BREAKER_FAIL_LIMIT = int(os.getenv("PROVIDER_BREAKER_FAIL_LIMIT", "5"))
+    PROVIDER_BREAKER_FAILURE_RATE = float(os.getenv("PROVIDER_BREAKER_FAILURE_RATE", "0.5"))
+    PROVIDER_BREAKER_WINDOW_SECONDS = int(os.getenv("PROVIDER_BREAKER_WINDOW_SECONDS", "60"))
+    PROVIDER_BREAKER_OPEN_SECONDS = int(os.getenv("PROVIDER_BREAKER_OPEN_SECONDS", "60"))
+    # Un appel plus lent compte comme un échec
+    PROVIDER_BREAKER_SLOW_MS = int(os.getenv("PROVIDER_BREAKER_SLOW_MS", "8000"))
+
     # --------------------------------------------------
     # SERVICES (ENV ONLY)
     # --------------------------------------------------
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from database import db
-from models import Conversion, Rate
+from models import Conversion
+from services.rate_cache import RateCache
 from datetime import datetime
 import random
 
@@ -16,7 +17,7 @@ def convertir():
         receiver_phone = request.form.get('receiver_phone')
 
         # 🔍 Recherche du taux défini par l’administrateur
-        rate = Rate.query.filter_by(from_currency=from_currency, to_currency=to_currency).first()
+        rate = RateCache.get(from_currency, to_currency)
         if not rate:
             flash("⚠️ Aucun taux défini pour cette paire de devises.")
             return redirect(url_for('convert.convertir'))
@@ -0,0 +1,10 @@
+# gunicorn.conf.py — chargé automatiquement par `gunicorn app:app`
+import os
+
+# Modèle de workers par défaut de gunicorn (sync), inchangé.
+# Le flux SSE des taux n'est pas servi ici (RATE_STREAM_MAX_CLIENTS=0) :
+# les pages se rabattent sur GET /convert/api/taux (ETag).
+# Flux en direct : processus dédié, voir gunicorn_stream.conf.py.
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
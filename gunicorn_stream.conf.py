@@ -0,0 +1,27 @@
+# gunicorn_stream.conf.py — processus dédié aux flux SSE (process `stream` du Procfile)
+#   gunicorn -c gunicorn_stream.conf.py app:app
+#
+# Mise en service :
+#   1. lancer ce processus (Procfile : stream)
+#   2. le reverse proxy lui envoie /convert/api/taux/stream et
+#      /admin/realtime/stream ; tout le reste (pages, paiements, /stats)
+#      reste sur les workers web de gunicorn.conf.py
+#   3. SSE_STREAMS_ENABLED=1 côté web : les pages ouvrent alors le flux,
+#      sinon elles relisent GET /convert/api/taux (ETag) et
+#      /admin/realtime/stats sans tenter le flux
+import os
+
+# Workers gevent : une connexion inactive coûte une greenlet, pas un thread
+worker_class = "gevent"
+workers = int(os.getenv("GUNICORN_STREAM_WORKERS", "1"))
+worker_connections = int(os.getenv("GUNICORN_STREAM_CONNECTIONS", "2000"))
+bind = os.getenv("GUNICORN_STREAM_BIND", "0.0.0.0:8001")
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Flux activés uniquement dans ce processus (connexions par worker)
+raw_env = [
+    f"RATE_STREAM_MAX_CLIENTS={os.getenv('RATE_STREAM_MAX_CLIENTS', '1000')}",
+    f"ADMIN_STREAM_MAX_CLIENTS={os.getenv('ADMIN_STREAM_MAX_CLIENTS', '100')}",
+]
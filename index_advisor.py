@@ -0,0 +1,75 @@
+import sys
+
+from app import app
+from models import Utilisateur
+from services.index_advisor import IndexAdvisor
+
+
+# Hôte www + HTTPS : évite les redirections de force_domain()
+BASE_URL = "https://www.localhost"
+
+# Pages chaudes rejouées par défaut (session admin)
+DEFAULT_PATHS = [
+    "/admin/dashboard",
+    "/admin/transactions",
+    "/admin/transactions?status=valide",
+    "/admin/transactions/",
+    "/admin/conversions",
+    "/admin/historique-envois",
+    "/admin/risques",
+    "/admin/audits",
+    "/admin/utilisateurs",
+    "/convert/historique",
+    "/convert/historique?search=XOF",
+    "/mon-solde",
+]
+
+
+def run_index_advisor(paths=None, repeat=1):
+    """
+    Rejoue un parcours de pages, capture les requêtes SQL exécutées et
+    signale celles qui font un parcours séquentiel.
+    `python index_advisor.py`                          : pages par défaut
+    `python index_advisor.py /admin/transactions ...`  : pages choisies
+    `python index_advisor.py --repeat=5`               : chaque page 5 fois
+    """
+    with app.app_context():
+        admin = Utilisateur.query.filter_by(is_admin=True).first()
+        if admin is None:
+            print("❌ Aucun utilisateur admin : créez-en un (create_admin.py)")
+            return 1
+
+        client = app.test_client()
+        with client.session_transaction(base_url=BASE_URL) as s:
+            s["user_id"] = admin.id
+            s["is_admin"] = True
+
+        with IndexAdvisor.capture() as captured:
+            for path in paths or DEFAULT_PATHS:
+                for _ in range(repeat):
+                    response = client.get(
+                        path, base_url=BASE_URL, headers={"X-Forwarded-Proto": "https"}
+                    )
+                print(f"🌐 {response.status_code} {path}")
+
+        findings = IndexAdvisor.analyze(captured)
+
+        print(f"\n🔬 {len(captured)} forme(s) de requête capturée(s), {len(findings)} à revoir\n")
+        for finding in findings:
+            tables = ", ".join(finding["tables"]) or "?"
+            print(f"⚠️  {finding['count']}× parcours séquentiel : {tables}")
+            print(f"   {finding['statement'][:300]}")
+            print("   " + finding["plan"].replace("\n", "\n   "))
+            print()
+
+        return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    repeat = next((a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--repeat=")), "1")
+    if not repeat.isdigit() or int(repeat) < 1:
+        print(f"❌ --repeat={repeat} : entier >= 1 attendu")
+        sys.exit(2)
+    repeat = int(repeat)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sys.exit(run_index_advisor(args or None, repeat=repeat))
@@ -0,0 +1,38 @@
+"""keyset_pagination_indexes
+
+Revision ID: a1e7c4b9d3f6
+Revises: f6c1d8e4a9b2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1e7c4b9d3f6'
+down_revision: Union[str, None] = 'f6c1d8e4a9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nom, table, colonnes) — ordre identique au ORDER BY des listes admin
+INDEXES = [
+    ('ix_conversion_date_id', 'conversion', ['date_conversion', 'id']),
+    ('ix_conversion_statut_date_id', 'conversion', ['statut', 'date_conversion', 'id']),
+    ('ix_transaction_date_id', 'transaction', ['date_transaction', 'id']),
+    ('ix_transaction_statut_date_id', 'transaction', ['statut', 'date_transaction', 'id']),
+    ('ix_risk_event_created_id', 'risk_event', ['created_at', 'id']),
+    ('ix_audit_log_created_id', 'audit_log', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
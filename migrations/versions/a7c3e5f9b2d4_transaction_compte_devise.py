@@ -0,0 +1,88 @@
+"""transaction_compte_devise
+
+Revision ID: a7c3e5f9b2d4
+Revises: e4b8c2f6a1d3
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e5f9b2d4'
+down_revision: Union[str, None] = 'e4b8c2f6a1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copie figée de Money.CURRENCY_DECIMALS au moment de la migration
+CURRENCY_DECIMALS = {
+    "XOF": 0,
+    "CFA": 0,
+    "XAF": 0,
+    "GNF": 0,
+    "EUR": 2,
+    "USD": 2,
+}
+DEFAULT_DECIMALS = 2
+DEFAULT_CURRENCY = "XOF"
+
+
+def _factor_case(column, mapping, default):
+    """CASE SQL donnant 10^decimales selon la devise de la ligne."""
+    whens = " ".join(
+        f"WHEN UPPER({column}) = '{key}' THEN {10 ** decimals}"
+        for key, decimals in mapping.items()
+    )
+    return f"(CASE {whens} ELSE {10 ** default} END)"
+
+
+def upgrade() -> None:
+    for table in ('transaction', 'compte'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column(
+                'devise', sa.String(length=10), nullable=False, server_default=DEFAULT_CURRENCY
+            ))
+
+    # ===============================
+    # BACKFILL depuis la conversion liée
+    # ===============================
+    # Paiement : montant = montant initial de la conversion
+    op.execute(
+        'UPDATE "transaction" SET devise = ('
+        'SELECT c.from_currency FROM paiement p '
+        'JOIN conversion c ON c.id = p.conversion_id '
+        'WHERE p.transaction_reference = "transaction".reference) '
+        'WHERE EXISTS ('
+        'SELECT 1 FROM paiement p '
+        'JOIN conversion c ON c.id = p.conversion_id '
+        'WHERE p.transaction_reference = "transaction".reference '
+        'AND c.from_currency IS NOT NULL)'
+    )
+    # Simulation (routes/paiement.py) : montant = montant converti
+    op.execute(
+        'UPDATE "transaction" SET devise = ('
+        'SELECT c.to_currency FROM conversion c '
+        "WHERE 'SIM-' || c.reference = \"transaction\".reference) "
+        'WHERE EXISTS ('
+        'SELECT 1 FROM conversion c '
+        "WHERE 'SIM-' || c.reference = \"transaction\".reference "
+        'AND c.to_currency IS NOT NULL)'
+    )
+
+    # montant_minor avait été calculé en devise par défaut
+    factor = _factor_case('devise', CURRENCY_DECIMALS, DEFAULT_DECIMALS)
+    op.execute(
+        f'UPDATE "transaction" SET montant_minor = '
+        f'CAST(ROUND(montant * {factor}) AS BIGINT) '
+        f"WHERE montant IS NOT NULL AND devise <> '{DEFAULT_CURRENCY}'"
+    )
+
+
+def downgrade() -> None:
+    for table in ('compte', 'transaction'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('devise')
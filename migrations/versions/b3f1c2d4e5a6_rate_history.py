@@ -0,0 +1,46 @@
+"""rate_history
+
+Revision ID: b3f1c2d4e5a6
+Revises: 698184e64da9
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c2d4e5a6'
+down_revision: Union[str, None] = '698184e64da9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_history',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('from_currency', sa.String(10), nullable=False),
+        sa.Column('to_currency', sa.String(10), nullable=False),
+        sa.Column('rate', sa.Float(), nullable=False),
+        sa.Column('effective_from', sa.DateTime(), nullable=False),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('utilisateur.id')),
+    )
+    op.create_index(
+        'ix_rate_history_pair_effective',
+        'rate_history',
+        ['from_currency', 'to_currency', 'effective_from']
+    )
+
+    # Point de départ : les taux actuels, effectifs à la date de migration
+    op.execute(
+        "INSERT INTO rate_history (from_currency, to_currency, rate, effective_from) "
+        "SELECT from_currency, to_currency, rate, CURRENT_TIMESTAMP FROM rate"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_history_pair_effective', table_name='rate_history')
+    op.drop_table('rate_history')
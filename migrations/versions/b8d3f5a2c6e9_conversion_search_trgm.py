@@ -0,0 +1,44 @@
+"""conversion_search_trgm
+
+Revision ID: b8d3f5a2c6e9
+Revises: a1e7c4b9d3f6
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d3f5a2c6e9'
+down_revision: Union[str, None] = 'a1e7c4b9d3f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Même expression que ConversionSearch.SEARCH_DOCUMENT (services/search.py)
+SEARCH_DOCUMENT = (
+    "lower(coalesce(reference, '') || ' ' || coalesce(from_currency, '') || ' ' || "
+    "coalesce(to_currency, '') || ' ' || coalesce(sender_phone, '') || ' ' || "
+    "coalesce(receiver_phone, ''))"
+)
+
+
+def upgrade() -> None:
+    # SQLite : table FTS5 créée par la migration e4b8c2f6a1d3
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_conversion_search_trgm ON conversion "
+        f"USING gin ({SEARCH_DOCUMENT} gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_conversion_search_trgm")
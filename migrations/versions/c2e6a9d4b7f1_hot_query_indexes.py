@@ -0,0 +1,50 @@
+"""hot_query_indexes
+
+Revision ID: c2e6a9d4b7f1
+Revises: b8d3f5a2c6e9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e6a9d4b7f1'
+down_revision: Union[str, None] = 'b8d3f5a2c6e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nom, table, colonnes)
+# Conversion(statut, date) et Transaction(statut) sont déjà servis par
+# ix_conversion_statut_date_id / ix_transaction_statut_date_id (préfixe).
+# Transaction(user_id) seul est couvert par le préfixe de ix_transaction_user_date.
+INDEXES = [
+    ('ix_conversion_user_date', 'conversion', ['user_id', 'date_conversion']),
+    ('ix_transaction_fournisseur_date', 'transaction', ['fournisseur', 'date_transaction']),
+    ('ix_transaction_user_date', 'transaction', ['user_id', 'date_transaction']),
+    ('ix_ledger_entry_compte_created', 'ledger_entry', ['compte', 'created_at']),
+    ('ix_depot_user_date', 'depot', ['user_id', 'date']),
+]
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    # `depot` (module paiements) n'est pas créée par les migrations
+    tables = _tables()
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    tables = _tables()
+    for name, table, _ in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,104 @@
+"""minor_unit_amounts
+
+Revision ID: c7d2e9a1f3b4
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e9a1f3b4'
+down_revision: Union[str, None] = 'b3f1c2d4e5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copie figée de Money.CURRENCY_DECIMALS au moment de la migration
+CURRENCY_DECIMALS = {
+    "XOF": 0,
+    "CFA": 0,
+    "XAF": 0,
+    "GNF": 0,
+    "EUR": 2,
+    "USD": 2,
+}
+DEFAULT_DECIMALS = 2
+DEFAULT_CURRENCY_DECIMALS = CURRENCY_DECIMALS["XOF"]
+
+COUNTRY_DECIMALS = {
+    "SN": CURRENCY_DECIMALS["XOF"],
+    "CI": CURRENCY_DECIMALS["XOF"],
+    "ML": CURRENCY_DECIMALS["XOF"],
+    "GN": CURRENCY_DECIMALS["GNF"],
+}
+
+COLUMNS = [
+    ('conversion', 'montant_initial_minor'),
+    ('conversion', 'montant_converti_minor'),
+    ('transaction', 'montant_minor'),
+    ('ledger_entry', 'montant_minor'),
+    ('compte', 'solde_minor'),
+    ('compte_systeme', 'solde_minor'),
+]
+
+
+def _factor_case(column, mapping, default):
+    """CASE SQL donnant 10^decimales selon la devise (ou le pays) de la ligne."""
+    whens = " ".join(
+        f"WHEN UPPER({column}) = '{key}' THEN {10 ** decimals}"
+        for key, decimals in mapping.items()
+    )
+    return f"(CASE {whens} ELSE {10 ** default} END)"
+
+
+def _backfill(table, target, source, factor_sql):
+    op.execute(
+        f'UPDATE "{table}" SET {target} = '
+        f'CAST(ROUND({source} * {factor_sql}) AS BIGINT) '
+        f'WHERE {source} IS NOT NULL'
+    )
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column(column, sa.BigInteger(), nullable=True))
+
+    # ===============================
+    # BACKFILL (en SQL, sans boucle Python)
+    # ===============================
+    _backfill(
+        'conversion', 'montant_initial_minor', 'montant_initial',
+        _factor_case('from_currency', CURRENCY_DECIMALS, DEFAULT_DECIMALS)
+    )
+    _backfill(
+        'conversion', 'montant_converti_minor', 'montant_converti',
+        _factor_case('to_currency', CURRENCY_DECIMALS, DEFAULT_DECIMALS)
+    )
+    _backfill(
+        'transaction', 'montant_minor', 'montant',
+        str(10 ** DEFAULT_CURRENCY_DECIMALS)
+    )
+    _backfill(
+        'ledger_entry', 'montant_minor', 'montant',
+        _factor_case('devise', CURRENCY_DECIMALS, DEFAULT_DECIMALS)
+    )
+    _backfill(
+        'compte', 'solde_minor', 'solde',
+        str(10 ** DEFAULT_CURRENCY_DECIMALS)
+    )
+    _backfill(
+        'compte_systeme', 'solde_minor', 'solde',
+        _factor_case('pays', COUNTRY_DECIMALS, DEFAULT_CURRENCY_DECIMALS)
+    )
+
+
+def downgrade() -> None:
+    for table, column in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column)
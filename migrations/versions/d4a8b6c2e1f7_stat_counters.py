@@ -0,0 +1,48 @@
+"""stat_counters
+
+Revision ID: d4a8b6c2e1f7
+Revises: c7d2e9a1f3b4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8b6c2e1f7'
+down_revision: Union[str, None] = 'c7d2e9a1f3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stat_counter',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('scope', sa.String(30), nullable=False),
+        sa.Column('statut', sa.String(20), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('volume_minor', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.UniqueConstraint('scope', 'statut', name='uq_stat_counter_scope_statut'),
+    )
+
+    # Amorçage depuis les données existantes (équivalent de rebuild_counters.py)
+    op.execute(
+        "INSERT INTO stat_counter (scope, statut, count, volume_minor, updated_at) "
+        "SELECT 'transaction', COALESCE(statut, ''), COUNT(*), "
+        "COALESCE(SUM(montant_minor), 0), CURRENT_TIMESTAMP "
+        "FROM \"transaction\" GROUP BY COALESCE(statut, '')"
+    )
+    op.execute(
+        "INSERT INTO stat_counter (scope, statut, count, volume_minor, updated_at) "
+        "SELECT 'conversion', COALESCE(statut, ''), COUNT(*), 0, CURRENT_TIMESTAMP "
+        "FROM conversion GROUP BY COALESCE(statut, '')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stat_counter')
@@ -0,0 +1,30 @@
+"""export_job_heartbeat
+
+Revision ID: d9f3b7e1a5c8
+Revises: c2e6a9d4b7f1
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3b7e1a5c8'
+down_revision: Union[str, None] = 'c2e6a9d4b7f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('export_job') as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime()))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('export_job') as batch_op:
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('heartbeat_at')
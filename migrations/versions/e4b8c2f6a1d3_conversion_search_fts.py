@@ -0,0 +1,74 @@
+"""conversion_search_fts
+
+Revision ID: e4b8c2f6a1d3
+Revises: d9f3b7e1a5c8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8c2f6a1d3'
+down_revision: Union[str, None] = 'd9f3b7e1a5c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mêmes colonnes que ConversionSearch.COLUMNS (services/search.py)
+COLUMNS = ("reference", "from_currency", "to_currency", "sender_phone", "receiver_phone")
+TABLE = "conversion_search"
+TRIGGERS = (f"{TABLE}_ai", f"{TABLE}_ad", f"{TABLE}_au")
+
+# ⚠️ Un batch_alter_table('conversion') sous SQLite recrée la table et
+# supprime ces triggers : la migration concernée doit les recréer
+# (downgrade() puis upgrade() de ce module).
+
+
+def upgrade() -> None:
+    # PostgreSQL : index trigramme de la migration b8d3f5a2c6e9
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    columns = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in COLUMNS)
+
+    try:
+        # Contenu externe : pas de copie des données
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"{columns}, content='conversion', content_rowid='id', tokenize='trigram')"
+        )
+    except sa.exc.OperationalError:
+        # SQLite < 3.34 ou compilé sans FTS5 : la recherche reste en LIKE
+        return
+
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ai AFTER INSERT ON conversion BEGIN "
+        f"INSERT INTO {TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ad AFTER DELETE ON conversion BEGIN "
+        f"INSERT INTO {TABLE}({TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_au AFTER UPDATE OF {columns} ON conversion BEGIN "
+        f"INSERT INTO {TABLE}({TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    op.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute(f"DROP TABLE IF EXISTS {TABLE}")
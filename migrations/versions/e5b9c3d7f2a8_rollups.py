@@ -0,0 +1,42 @@
+"""rollups
+
+Revision ID: e5b9c3d7f2a8
+Revises: d4a8b6c2e1f7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c3d7f2a8'
+down_revision: Union[str, None] = 'd4a8b6c2e1f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rempli par run_rollups.py (premier passage = recalcul complet)
+    op.create_table(
+        'rollup',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('granularity', sa.String(10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('fournisseur', sa.String(50), nullable=False),
+        sa.Column('devise', sa.String(10), nullable=False),
+        sa.Column('statut', sa.String(20), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('volume_minor', sa.BigInteger(), nullable=False),
+        sa.UniqueConstraint(
+            'source', 'granularity', 'bucket_start', 'fournisseur', 'devise', 'statut',
+            name='uq_rollup_bucket_key'
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup')
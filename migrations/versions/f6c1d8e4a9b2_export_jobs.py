@@ -0,0 +1,47 @@
+"""export_jobs
+
+Revision ID: f6c1d8e4a9b2
+Revises: e5b9c3d7f2a8
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c1d8e4a9b2'
+down_revision: Union[str, None] = 'e5b9c3d7f2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'export_job',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(30), nullable=False),
+        sa.Column('format', sa.String(10), nullable=False),
+        sa.Column('params', sa.JSON()),
+        sa.Column('params_hash', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('total_rows', sa.Integer()),
+        sa.Column('rows_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('file_path', sa.String(255)),
+        sa.Column('file_size', sa.BigInteger()),
+        sa.Column('error', sa.Text()),
+        sa.Column('requested_by', sa.Integer(), sa.ForeignKey('utilisateur.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('started_at', sa.DateTime()),
+        sa.Column('finished_at', sa.DateTime()),
+    )
+    op.create_index('ix_export_job_params_hash', 'export_job', ['params_hash'])
+    op.create_index('ix_export_job_status', 'export_job', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_job_status', table_name='export_job')
+    op.drop_index('ix_export_job_params_hash', table_name='export_job')
+    op.drop_table('export_job')
@@ -1,8 +1,11 @@
 from database import db
+from sqlalchemy import event, cast, func
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from itsdangerous import URLSafeTimedSerializer
 from flask import current_app
 from services.constants import PaymentStatus
+from services.money import Money
 
 # ======================================================
 # 👤 UTILISATEUR
@@ -84,6 +87,29 @@ class Rate(db.Model):
         return f"<Rate {self.from_currency}->{self.to_currency}={self.rate}>"
 
 
+class RateHistory(db.Model):
+    """Historique append-only des taux (jamais modifié, jamais supprimé)."""
+    __tablename__ = "rate_history"
+
+    id = db.Column(db.Integer, primary_key=True)
+    from_currency = db.Column(db.String(10), nullable=False)
+    to_currency = db.Column(db.String(10), nullable=False)
+    rate = db.Column(db.Float, nullable=False)
+
+    effective_from = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_by = db.Column(db.Integer, db.ForeignKey('utilisateur.id'), nullable=True)
+
+    __table_args__ = (
+        db.Index(
+            'ix_rate_history_pair_effective',
+            'from_currency', 'to_currency', 'effective_from'
+        ),
+    )
+
+    def __repr__(self):
+        return f"<RateHistory {self.from_currency}->{self.to_currency}={self.rate} @ {self.effective_from}>"
+
+
 # ======================================================
 # 🔁 CONVERSION
 # ======================================================
@@ -99,6 +125,10 @@ class Conversion(db.Model):
     montant_initial = db.Column(db.Float, nullable=False)
     montant_converti = db.Column(db.Float, nullable=False)
 
+    # 💯 Unités mineures entières (synchronisées automatiquement, cf. bas de fichier)
+    montant_initial_minor = db.Column(db.BigInteger)
+    montant_converti_minor = db.Column(db.BigInteger)
+
     sender_phone = db.Column(db.String(20))
     receiver_phone = db.Column(db.String(20))
 
@@ -112,6 +142,14 @@ class Conversion(db.Model):
     user = db.relationship('Utilisateur', backref='conversions')
     compte_systeme = db.relationship('CompteSysteme', backref='conversions')
 
+    # Pagination keyset des listes admin (services/pagination.py)
+    __table_args__ = (
+        db.Index('ix_conversion_date_id', 'date_conversion', 'id'),
+        db.Index('ix_conversion_statut_date_id', 'statut', 'date_conversion', 'id'),
+        # Historique utilisateur
+        db.Index('ix_conversion_user_date', 'user_id', 'date_conversion'),
+    )
+
     def __repr__(self):
         return f"<Conversion {self.reference} {self.from_currency}->{self.to_currency}>"
 
@@ -125,6 +163,8 @@ class Compte(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('utilisateur.id'), unique=True)
     solde = db.Column(db.Float, default=0.0)
+    solde_minor = db.Column(db.BigInteger, default=0)
+    devise = db.Column(db.String(10), nullable=False, default=Money.DEFAULT_CURRENCY, server_default=Money.DEFAULT_CURRENCY)
     date_maj = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = db.relationship('Utilisateur', backref=db.backref('compte', uselist=False))
@@ -144,6 +184,10 @@ class Transaction(db.Model):
 
     type = db.Column(db.String(20), nullable=False)  # depot / retrait / paiement
     montant = db.Column(db.Float, nullable=False)
+    montant_minor = db.Column(db.BigInteger)
+    # Devise de `montant` : source de la conversion pour un paiement,
+    # cible pour une simulation, FCFA pour un dépôt
+    devise = db.Column(db.String(10), nullable=False, default=Money.DEFAULT_CURRENCY, server_default=Money.DEFAULT_CURRENCY)
 
     statut = db.Column(db.String(20), default=PaymentStatus.EN_ATTENTE.value)   
     fournisseur = db.Column(db.String(50), nullable=False)
@@ -153,6 +197,15 @@ class Transaction(db.Model):
 
     user = db.relationship('Utilisateur', backref='transactions')
 
+    # Pagination keyset des listes admin (services/pagination.py)
+    __table_args__ = (
+        db.Index('ix_transaction_date_id', 'date_transaction', 'id'),
+        db.Index('ix_transaction_statut_date_id', 'statut', 'date_transaction', 'id'),
+        # Filtres fournisseur (admin, rollups) et solde utilisateur
+        db.Index('ix_transaction_fournisseur_date', 'fournisseur', 'date_transaction'),
+        db.Index('ix_transaction_user_date', 'user_id', 'date_transaction'),
+    )
+
     def __repr__(self):
         return f"<Transaction {self.fournisseur} {self.montant}>"
 
@@ -210,6 +263,7 @@ class CompteSysteme(db.Model):
 
     actif = db.Column(db.Boolean, default=True)
     solde = db.Column(db.Float, default=0.0)
+    solde_minor = db.Column(db.BigInteger, default=0)
 
     date_creation = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
 
@@ -230,6 +284,32 @@ class Parametre(db.Model):
     def __repr__(self):
         return f"<Parametre {self.cle}={self.valeur}>"
 
+    @classmethod
+    def increment(cls, cle):
+        """
+        Incrémente un compteur en une seule requête (UPDATE ... RETURNING) :
+        deux transactions concurrentes obtiennent deux valeurs distinctes.
+        Le commit reste à la charge de l'appelant.
+        """
+        table = cls.__table__
+        stmt = (
+            table.update()
+            .where(table.c.cle == cle)
+            .values(valeur=cast(func.coalesce(cast(table.c.valeur, db.Integer), 0) + 1, db.String))
+            .returning(table.c.valeur)
+        )
+        valeur = db.session.execute(stmt).scalar()
+        if valeur is not None:
+            return valeur
+
+        # Première incrémentation : création de la ligne (course possible entre workers)
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(cle=cle, valeur="1"))
+            return "1"
+        except IntegrityError:
+            return db.session.execute(stmt).scalar()
+
 
 # ======================================================
 # 🔐 RESET TOKEN (DB)
@@ -300,6 +380,7 @@ class LedgerEntry(db.Model):
     # debit / credit
 
     montant = db.Column(db.Float, nullable=False)
+    montant_minor = db.Column(db.BigInteger)
     devise = db.Column(db.String(10), nullable=False)
 
     # 🔎 Métadonnées
@@ -308,6 +389,10 @@ class LedgerEntry(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_ledger_entry_compte_created', 'compte', 'created_at'),
+    )
+
     def __repr__(self):
         return f"<Ledger {self.sens} {self.montant} {self.devise} {self.compte}>"
 
@@ -329,6 +414,10 @@ class RiskEvent(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_risk_event_created_id', 'created_at', 'id'),
+    )
+
 
 class AuditLog(db.Model):
     __tablename__ = "audit_log"
@@ -346,6 +435,10 @@ class AuditLog(db.Model):
     ip_address = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_audit_log_created_id', 'created_at', 'id'),
+    )
+
 
 class Refund(db.Model):
     __tablename__ = "refund"
@@ -363,4 +456,146 @@ class Refund(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# ======================================================
+# 🧮 COMPTEURS STATISTIQUES (maintenus à chaque flush)
+# ======================================================
+class StatCounter(db.Model):
+    """
+    Nombre de lignes (et volume) par statut, tenus à jour dans la même
+    transaction que chaque changement de statut (services/stat_counters.py).
+    """
+    __tablename__ = "stat_counter"
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(30), nullable=False)   # transaction / conversion
+    statut = db.Column(db.String(20), nullable=False, default="")
+
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    volume_minor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'statut', name='uq_stat_counter_scope_statut'),
+    )
+
+    def __repr__(self):
+        return f"<StatCounter {self.scope}/{self.statut}={self.count}>"
+
+
+# ======================================================
+# 📈 AGRÉGATS PAR TRANCHE DE TEMPS (minute / heure / jour)
+# ======================================================
+class Rollup(db.Model):
+    """
+    Nombre et volume par (fournisseur, devise, statut) et par tranche de temps,
+    calculés par le job services/rollups.py à partir d'un watermark.
+    Pour ledger_entry, `statut` porte le sens de l'écriture (debit / credit).
+    """
+    __tablename__ = "rollup"
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(20), nullable=False)        # transaction / conversion / ledger
+    granularity = db.Column(db.String(10), nullable=False)   # minute / hour / day
+    bucket_start = db.Column(db.DateTime, nullable=False)    # UTC
+
+    fournisseur = db.Column(db.String(50), nullable=False, default="")
+    devise = db.Column(db.String(10), nullable=False, default="")
+    statut = db.Column(db.String(20), nullable=False, default="")
+
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    volume_minor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            'source', 'granularity', 'bucket_start', 'fournisseur', 'devise', 'statut',
+            name='uq_rollup_bucket_key'
+        ),
+    )
+
+    def __repr__(self):
+        return f"<Rollup {self.source}/{self.granularity} {self.bucket_start} {self.count}>"
+
+
+# ======================================================
+# 📤 EXPORTS EN ARRIÈRE-PLAN
+# ======================================================
+class ExportJob(db.Model):
+    """
+    Demande d'export traitée par run_export_worker.py (services/export_jobs.py).
+    Le fichier produit est conservé sur disque et resservi tel quel
+    pour une demande identique (même params_hash).
+    """
+    __tablename__ = "export_job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)     # conversions / transactions / ledger
+    format = db.Column(db.String(10), nullable=False)   # csv / xlsx
+    params = db.Column(db.JSON)
+    params_hash = db.Column(db.String(64), nullable=False, index=True)
+
+    # en_attente / en_cours / termine / echoue / expire
+    status = db.Column(db.String(20), nullable=False, default="en_attente", index=True)
+    total_rows = db.Column(db.Integer)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+
+    file_path = db.Column(db.String(255))
+    file_size = db.Column(db.BigInteger)
+    error = db.Column(db.Text)
+
+    requested_by = db.Column(db.Integer, db.ForeignKey("utilisateur.id"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Mis à jour à chaque lot : un job `en_cours` silencieux est repris
+    heartbeat_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def progress(self):
+        if self.status == "termine":
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_done * 100 / self.total_rows))
+
+    def __repr__(self):
+        return f"<ExportJob {self.id} {self.kind}.{self.format} {self.status}>"
+
+
+# ======================================================
+# 💯 SYNCHRO MONTANTS -> UNITÉS MINEURES
+# ======================================================
+# Chaque INSERT/UPDATE ORM recalcule les colonnes *_minor à partir des
+# colonnes Float : aucun appelant n'a à s'en soucier.
+# ⚠️ Les UPDATE en masse (query.update()) ne passent pas par ces hooks.
+MINOR_UNIT_FIELDS = {
+    Conversion: [
+        ("montant_initial", "montant_initial_minor", lambda o: o.from_currency),
+        ("montant_converti", "montant_converti_minor", lambda o: o.to_currency),
+    ],
+    Transaction: [
+        ("montant", "montant_minor", lambda o: o.devise),
+    ],
+    LedgerEntry: [
+        ("montant", "montant_minor", lambda o: o.devise),
+    ],
+    Compte: [
+        ("solde", "solde_minor", lambda o: o.devise),
+    ],
+    CompteSysteme: [
+        ("solde", "solde_minor", lambda o: Money.currency_for_country(o.pays)),
+    ],
+}
+
+
+def _sync_minor_units(mapper, connection, target):
+    for amount_attr, minor_attr, currency_of in MINOR_UNIT_FIELDS[type(target)]:
+        amount = getattr(target, amount_attr)
+        setattr(target, minor_attr, Money.to_minor(amount, currency_of(target)))
+
+
+for _model in MINOR_UNIT_FIELDS:
+    event.listen(_model, "before_insert", _sync_minor_units)
+    event.listen(_model, "before_update", _sync_minor_units)
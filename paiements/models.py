@@ -33,7 +33,11 @@ class Depot(db.Model):
 
     date = db.Column(db.DateTime, default=datetime.utcnow)
     reference = db.Column(db.String(50), unique=True)
-    
+
+    __table_args__ = (
+        db.Index('ix_depot_user_date', 'user_id', 'date'),
+    )
+
 
 class LogDepot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
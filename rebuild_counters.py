@@ -0,0 +1,21 @@
+from app import app
+from database import db
+from services.stat_counters import StatCounters
+
+
+def rebuild_counters():
+    """Recalcule les compteurs statistiques (stat_counter) depuis zéro."""
+    with app.app_context():
+        StatCounters.rebuild()
+        db.session.commit()
+
+        for scope, statuts in StatCounters.read().items():
+            print(f"📊 {scope}")
+            for statut, counter in sorted(statuts.items()):
+                print(f"   {statut or '(vide)'} : {counter['count']} (volume {counter['volume_minor']})")
+
+        print("\n✅ Compteurs reconstruits.")
+
+
+if __name__ == "__main__":
+    rebuild_counters()
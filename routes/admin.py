@@ -1,11 +1,21 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file, jsonify, Response, stream_with_context
 from database import db
-from models import Utilisateur, Rate, Compte, Transaction, Conversion, CompteSysteme, Parametre, RiskEvent, AuditLog, Utilisateur
+from models import Utilisateur, Rate, Compte, Transaction, Conversion, CompteSysteme, Parametre, RiskEvent, AuditLog, Utilisateur, ExportJob
 import io
-from datetime import datetime
-from openpyxl import Workbook
-from io import BytesIO 
+from datetime import datetime, timedelta
 from functools import wraps
+from services.rate_cache import RateCache
+from services.account_selector import SystemAccountSelector
+from services.rate_history import RateHistoryService
+from services.dashboard_service import AdminDashboardService
+from services.rollups import RollupService
+from services.exports import ConversionExport, EXPORTS
+from services.export_jobs import ExportJobService
+from services.pagination import KeysetPagination
+from services.query_budget import query_budget
+from services.http_client import ProviderHTTP
+from services.provider_health import ProviderHealth
+from sqlalchemy.orm import joinedload
  
 
 
@@ -37,26 +47,11 @@ def admin_required(f):
 
 @admin.route('/dashboard')
 @admin_required
+@query_budget(12)
 def dashboard():
-    total_users = Utilisateur.query.count()
-    total_transactions = Transaction.query.count()
-    total_fonds = db.session.query(db.func.sum(Compte.solde)).scalar() or 0.0
-    transactions = Transaction.query.order_by(Transaction.date_transaction.desc()).limit(5).all()
-
-    # 👉 Récupération des taux actuels
-    taux_list = Rate.query.all()
-    
-    # 🔴 TRANSACTIONS
-    tx_pending = Transaction.query.filter_by(statut="en_attente").count()
-    tx_valid = Transaction.query.filter_by(statut="valide").count()
-    tx_blocked = Transaction.query.filter_by(statut="bloque").count()
-    tx_failed = Transaction.query.filter_by(statut="echoue").count()
-
-    # 🔵 CONVERSIONS (avant paiement)
-    conv_pending = Conversion.query.filter_by(statut="en_attente").count()
-
-    total_transactions = Transaction.query.count()
-    total_fonds = db.session.query(db.func.sum(Compte.solde)).scalar() or 0.0
+    # 📊 Tous les compteurs en quelques requêtes groupées, cache TTL partagé
+    stats = AdminDashboardService.stats()
+    count = AdminDashboardService.count
 
     # dernières transactions
     transactions = (
@@ -66,22 +61,23 @@ def dashboard():
         .all()
     )
 
-    taux_list = Rate.query.all()
+    # 👉 Taux actuels (cache mémoire, sans requête)
+    taux_list = list(RateCache.snapshot().rates.values())
 
     return render_template(
         "admin_dashboard.html",
-        total_users=total_users,
-        total_transactions=total_transactions,
-        total_fonds=total_fonds,
+        total_users=stats["users"],
+        total_transactions=stats["transactions"]["total"],
+        total_fonds=stats["fonds"],
         transactions=transactions,
         taux_list=taux_list,
 
         # 👇 STATS TEMPS RÉEL
-        tx_pending=tx_pending,
-        tx_valid=tx_valid,
-        tx_blocked=tx_blocked,
-        tx_failed=tx_failed,
-        conv_pending=conv_pending
+        tx_pending=count("transactions", "en_attente"),
+        tx_valid=count("transactions", "valide"),
+        tx_blocked=count("transactions", "bloque"),
+        tx_failed=count("transactions", "echoue"),
+        conv_pending=count("conversions", "en_attente")
     )
 
    
@@ -108,6 +104,15 @@ def gerer_taux():
     if not rate_gnf_cfa:
         rate_gnf_cfa = Rate(from_currency='GNF', to_currency='CFA', rate=0.07)
         db.session.add(rate_gnf_cfa)
+
+    if db.session.new:
+        for rate in (rate_cfa_gnf, rate_gnf_cfa):
+            if rate in db.session.new:
+                RateHistoryService.record(
+                    rate.from_currency, rate.to_currency, rate.rate,
+                    created_by=session.get('user_id')
+                )
+        RateCache.bump_version()
     db.session.commit()
 
     # Si formulaire soumis
@@ -123,8 +128,17 @@ def gerer_taux():
             flash("Les taux doivent être supérieurs à 0.")
             return redirect(url_for('admin.gerer_taux'))
 
-        rate_cfa_gnf.rate = cfa_gnf
-        rate_gnf_cfa.rate = gnf_cfa
+        # 🕓 Historique append-only : seules les valeurs modifiées sont tracées
+        for rate, valeur in ((rate_cfa_gnf, cfa_gnf), (rate_gnf_cfa, gnf_cfa)):
+            if rate.rate != valeur:
+                rate.rate = valeur
+                RateHistoryService.record(
+                    rate.from_currency, rate.to_currency, valeur,
+                    created_by=session.get('user_id')
+                )
+
+        # 🔁 Invalide le cache des taux dans tous les workers
+        RateCache.bump_version()
         db.session.commit()
         flash("✅ Taux mis à jour avec succès.")
         return redirect(url_for('admin.gerer_taux'))
@@ -139,185 +153,150 @@ def gerer_taux():
 # ============================
 @admin.route('/conversions')
 @admin_required
+@query_budget(5)
 def liste_conversions():
-    """Liste des conversions pour l’admin"""
-    conversions = (
-        Conversion.query
-        .order_by(Conversion.date_conversion.desc())
-        .all()
+    """Liste des conversions pour l’admin (pagination par curseur)"""
+    page = KeysetPagination.from_request(
+        Conversion.query,
+        Conversion.date_conversion,
+        Conversion.id
     )
     return render_template(
         'admin_conversions.html',
-        conversions=conversions
+        conversions=page.items,
+        page=page
     )
     
-# 🔹 Liste filtrable des conversions
+# 🔹 Export des conversions (streaming, mémoire constante)
 @admin.route('/conversions/export')
 @admin_required
 def export_conversions():
-    # 🔐 sécurité : seulement admin
-    user_id = session.get("user_id")
-    user = None
-    if user_id:
-        user = Utilisateur.query.get(user_id)
-    if not user or not user.is_admin:
-        flash("Accès réservé à l’administrateur.", "error")
-        return redirect(url_for("auth.connexion"))
-
-    # 🔎 récupérer toutes les conversions
-    conversions = (
-        Conversion.query
-        .order_by(Conversion.date_conversion.desc())
-        .all()
+    """
+    ?format=xlsx|csv&date_from=AAAA-MM-JJ&date_to=AAAA-MM-JJ&statut=...
+    Les lignes sont lues par lots et envoyées au fil de l'eau.
+    Export en arrière-plan : formulaire POST de /admin/exports (jeton CSRF).
+    """
+    try:
+        filters = ConversionExport.parse_filters(request.args)
+        body, mimetype, filename = ConversionExport.stream(
+            request.args.get("format", "xlsx"),
+            filters
+        )
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin.liste_conversions"))
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",
+        }
     )
 
-    # 📘 création du fichier Excel avec openpyxl
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Conversions"
-
-    # En-têtes
-    headers = [
-        "ID",
-        "Utilisateur ID",
-        "Devise source",
-        "Devise cible",
-        "Montant initial",
-        "Montant converti",
-        "Téléphone envoyeur",
-        "Téléphone receveur",
-        "Référence",
-        "Date conversion",
-        "Statut",
-        "Compte système"
-    ]
-    ws.append(headers)
-
-    # Lignes
-    for c in conversions:
-        ws.append([
-            c.id,
-            c.user_id,
-            c.from_currency,
-            c.to_currency,
-            c.montant_initial,
-            c.montant_converti,
-            c.sender_phone,
-            c.receiver_phone,
-            c.reference,
-            c.date_conversion.strftime("%Y-%m-%d %H:%M:%S") if c.date_conversion else "",
-            c.statut,
-            c.compte_systeme.nom if c.compte_systeme else ""
-        ])
-
-    # Sauvegarde en mémoire
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    filename = f"conversions_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=filename,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# =============================
+# 📤 Exports en arrière-plan
+# =============================
+
+def _submit_export(kind, args):
+    try:
+        job, reused = ExportJobService.submit(
+            kind,
+            args.get("format", "xlsx"),
+            args,
+            user_id=session.get("user_id")
+        )
+        db.session.commit()
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin.exports"))
+
+    if reused:
+        flash("Un export identique existe déjà : il est réutilisé.", "info")
+    else:
+        flash("Export demandé : il sera prêt dans quelques instants.", "success")
+    return redirect(url_for("admin.exports"))
+
+
+@admin.route("/exports", methods=["GET", "POST"])
+@admin_required
+def exports():
+    if request.method == "POST":
+        return _submit_export(request.form.get("kind", "conversions"), request.form)
+
+    jobs = (
+        ExportJob.query
+        .order_by(ExportJob.id.desc())
+        .limit(50)
+        .all()
     )
 
-    """Exporte toutes les conversions au format Excel (avec comptes système)."""
-    
+    return render_template(
+        "admin/exports.html",
+        jobs=jobs,
+        kinds=list(EXPORTS)
+    )
 
-    # Récupération de toutes les conversions
-    conversions = Conversion.query.order_by(Conversion.date_conversion.desc()).all()
-
-    # Création du fichier Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Conversions"
-
-    # ✅ En-têtes de colonnes
-    ws.append([
-        "Référence",
-        "Utilisateur",
-        "Email utilisateur",
-        "De (devise)",
-        "Vers (devise)",
-        "Montant initial",
-        "Montant converti",
-        "Téléphone envoyeur",
-        "Téléphone récepteur",
-        "Statut",
-        "Date de conversion",
-        "Compte système (nom)",
-        "Fournisseur",
-        "Pays"
-    ])
-
-    # ✅ Remplir les lignes
-    for c in conversions:
-        utilisateur = Utilisateur.query.get(c.user_id) if c.user_id else None
-        compte = c.compte_systeme
-
-        ws.append([
-            c.reference or "",
-            f"{utilisateur.prenom} {utilisateur.nom}" if utilisateur else "—",
-            utilisateur.email if utilisateur else "—",
-            c.from_currency or "",
-            c.to_currency or "",
-            c.montant_initial or 0,
-            c.montant_converti or 0,
-            c.sender_phone or "",
-            c.receiver_phone or "",
-            c.statut or "",
-            c.date_conversion.strftime("%d/%m/%Y %H:%M") if c.date_conversion else "",
-            compte.nom if compte else "—",
-            compte.fournisseur if compte else "—",
-            compte.pays if compte else "—"
-        ])
-
-    # Ajustement automatique de la largeur des colonnes
-    for column in ws.columns:
-        max_length = max(len(str(cell.value or "")) for cell in column)
-        ws.column_dimensions[column[0].column_letter].width = max_length + 2
-
-    # ✅ Envoi du fichier à télécharger
-    file_stream = BytesIO()
-    wb.save(file_stream)
-    file_stream.seek(0)
 
+@admin.route("/exports/<int:job_id>")
+@admin_required
+def export_status(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    return jsonify(ExportJobService.to_dict(job))
+
+
+@admin.route("/exports/<int:job_id>/download")
+@admin_required
+def export_download(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+
+    info = ExportJobService.download_info(job)
+    if info is None:
+        flash("Ce fichier n'est pas (ou plus) disponible.", "warning")
+        return redirect(url_for("admin.exports"))
+
+    path, mimetype, filename = info
+    # Fichier servi depuis le disque (Range / If-Modified-Since gérés)
     return send_file(
-        file_stream,
+        path,
+        mimetype=mimetype,
         as_attachment=True,
-        download_name=f"conversions_{datetime.utcnow().strftime('%Y%m%d_%H%M')}.xlsx",
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        download_name=filename,
+        conditional=True
     )
 
 
-
-
 # =============================
 # 📦 Historique des envois
 # =============================
 
 @admin.route("/historique-envois")
 @admin_required
+@query_budget(5)
 def historique_envois():
-    page = request.args.get("page", 1, type=int)
     statut = request.args.get("statut", None)
 
-    query = Conversion.query.order_by(Conversion.date_conversion.desc())
+    # Utilisateur chargé par jointure : le template affiche c.user
+    query = Conversion.query.options(joinedload(Conversion.user))
 
     if statut and statut in ["en_attente", "paiement_en_cours", "valide", "echoue"]:
        query = query.filter(Conversion.statut == statut)
 
-
-    pagination = query.paginate(page=page, per_page=10, error_out=False)
-    conversions = pagination.items
+    page = KeysetPagination.from_request(
+        query,
+        Conversion.date_conversion,
+        Conversion.id,
+        per_page=10
+    )
 
     return render_template(
         "admin_historique.html",
-        conversions=conversions,
-        pagination=pagination,
+        conversions=page.items,
+        page=page,
         statut=statut
     )
 
@@ -347,6 +326,7 @@ def comptes_systeme():
             actif=True
         )
         db.session.add(nouveau_compte)
+        SystemAccountSelector.bump_version()
         db.session.commit()
         flash(f"✅ Compte '{nom}' ajouté avec succès.", "success")
         return redirect(url_for('admin.comptes_systeme'))
@@ -361,6 +341,7 @@ def toggle_compte(id):
     """Active ou désactive un compte système."""
     compte = CompteSysteme.query.get_or_404(id)
     compte.actif = not compte.actif
+    SystemAccountSelector.bump_version()
     db.session.commit()
     statut = "activé" if compte.actif else "désactivé"
     flash(f"🔄 Compte {compte.nom} {statut}.", "info")
@@ -373,6 +354,7 @@ def supprimer_compte(id):
     """Supprime définitivement un compte système."""
     compte = CompteSysteme.query.get_or_404(id)
     db.session.delete(compte)
+    SystemAccountSelector.bump_version()
     db.session.commit()
     flash(f"🗑️ Compte {compte.nom} supprimé.", "danger")
     return redirect(url_for('admin.comptes_systeme'))
@@ -427,6 +409,7 @@ def admin_maintenance():
     
 @admin.route("/transactions")
 @admin_required
+@query_budget(5)
 def transactions():
     status = request.args.get("status")
     provider = request.args.get("provider")
@@ -453,16 +436,17 @@ def transactions():
         like = f"%{search}%"
         query = query.filter(Transaction.reference.ilike(like))
 
-    transactions = (
-        query
-        .order_by(Transaction.date_transaction.desc())
-        .limit(100)
-        .all()
+    page = KeysetPagination.from_request(
+        query,
+        Transaction.date_transaction,
+        Transaction.id,
+        per_page=100
     )
 
     return render_template(
         "admin/transactions.html",
-        transactions=transactions,
+        transactions=page.items,
+        page=page,
         current_status=status
     )
 
@@ -471,28 +455,38 @@ def transactions():
 
 @admin.route("/risques")
 @admin_required
+@query_budget(5)
 def risques():
-    risks = (
-        RiskEvent.query
-        .order_by(RiskEvent.created_at.desc())
-        .limit(100)
-        .all()
+    page = KeysetPagination.from_request(
+        RiskEvent.query,
+        RiskEvent.created_at,
+        RiskEvent.id,
+        per_page=100
     )
 
     return render_template(
         "admin/risques.html",
-        risks=risks
+        risks=page.items,
+        page=page
     )
 
     
 @admin.route("/utilisateurs")
 @admin_required
+@query_budget(5)
 def utilisateurs():
-    users = Utilisateur.query.order_by(Utilisateur.id.desc()).all()
+    # Pas de date d'inscription : curseur sur l'id seul
+    page = KeysetPagination.from_request(
+        Utilisateur.query,
+        None,
+        Utilisateur.id,
+        per_page=100
+    )
 
     return render_template(
         "admin/utilisateurs.html",
-        users=users
+        users=page.items,
+        page=page
     )
 
     
@@ -501,17 +495,70 @@ def utilisateurs():
 
 @admin.route("/audits")
 @admin_required
+@query_budget(5)
 def audits():
-    logs = (
-        AuditLog.query
-        .order_by(AuditLog.created_at.desc())
-        .limit(100)
-        .all()
+    page = KeysetPagination.from_request(
+        AuditLog.query,
+        AuditLog.created_at,
+        AuditLog.id,
+        per_page=100
     )
 
     return render_template(
         "admin/audits.html",
-        logs=logs
+        logs=page.items,
+        page=page
     )
 
-    
\ No newline at end of file
+    
+
+
+# ============================
+# 📈 Agrégats temporels (graphiques)
+# ============================
+
+@admin.route("/api/rollups")
+@admin_required
+def api_rollups():
+    """
+    GET /admin/api/rollups?source=transaction&from=2026-09-01&to=2026-10-01
+        [&granularity=day][&group_by=fournisseur,statut][&fournisseur=…&devise=…&statut=…]
+    Lu uniquement dans la table rollup (run_rollups.py).
+    """
+    try:
+        end = datetime.fromisoformat(request.args["to"]) if request.args.get("to") else datetime.utcnow()
+        start = datetime.fromisoformat(request.args["from"]) if request.args.get("from") else end - timedelta(days=30)
+
+        result = RollupService.series(
+            request.args.get("source", "transaction"),
+            start,
+            end,
+            granularity=request.args.get("granularity") or None,
+            group_by=[g for g in request.args.get("group_by", "").split(",") if g],
+            **{d: request.args.get(d) for d in RollupService.DIMENSIONS}
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result)
+
+
+# ============================
+# ⏱️ Latence des fournisseurs
+# ============================
+
+@admin.route("/api/provider-latency")
+@admin_required
+def api_provider_latency():
+    """Appels sortants par hôte (worker courant) : nombre, erreurs, p50/p95/p99."""
+    return jsonify(ProviderHTTP.stats())
+
+
+@admin.route("/api/provider-health")
+@admin_required
+def api_provider_health():
+    """État des disjoncteurs (partagé par les workers de la machine)."""
+    return jsonify({
+        provider: ProviderHealth.status(provider)
+        for provider in ("Orange Money", "Wave")
+    })
@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify, session
+from flask import Blueprint, jsonify, session, current_app, Response
+
 from services.dashboard_service import AdminDashboardService
+from services.event_stream import Broadcaster
 
 admin_realtime = Blueprint(
     "admin_realtime",
@@ -7,9 +9,46 @@ admin_realtime = Blueprint(
     url_prefix="/admin/realtime"
 )
 
+# 📡 Un seul calcul par worker, quel que soit le nombre d'onglets admin ouverts.
+# Le producteur relit les compteurs (O(1)) et ne pousse qu'en cas de changement.
+admin_stream = Broadcaster(
+    "admin",
+    lambda: AdminDashboardService.snapshot(AdminDashboardService.compute()),
+    interval_setting="ADMIN_STREAM_POLL_SECONDS"
+)
+
+
 @admin_realtime.route("/stats")
 def realtime_stats():
+    # Repli pour les navigateurs sans EventSource ou sans processus `stream`
     if not session.get("is_admin"):
         return jsonify({"error": "unauthorized"}), 403
 
     return jsonify(AdminDashboardService.snapshot())
+
+
+@admin_realtime.route("/stream")
+def realtime_stream():
+    if not session.get("is_admin"):
+        return jsonify({"error": "unauthorized"}), 403
+
+    stream = admin_stream.subscribe(
+        current_app._get_current_object(),
+        event="stats",
+        max_age=current_app.config.get("ADMIN_STREAM_MAX_AGE", 300),
+        max_subscribers=current_app.config.get("ADMIN_STREAM_MAX_CLIENTS", 0)
+    )
+
+    if stream is None:
+        # Flux désactivé sur ce worker ou complet : sur un 204, EventSource
+        # ne se reconnecte pas et la page passe en polling sur /stats
+        return Response(status=204)
+
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # pas de buffering côté proxy
+        }
+    )
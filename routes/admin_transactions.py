@@ -4,6 +4,7 @@ from database import db
 from models import Transaction, Paiement, Conversion, Utilisateur
 from services.admin_actions import AdminActions
 from services.risk_engine import RiskEngine
+from services.pagination import KeysetPagination
 
 
 
@@ -28,16 +29,17 @@ def admin_only():
 #LISTE DES TRANSACTIONS(VU GLOBALE)
 @admin_tx.route("/")
 def liste():
-    transactions = (
-        Transaction.query
-        .order_by(Transaction.date_transaction.desc())
-        .limit(200)
-        .all()
+    page = KeysetPagination.from_request(
+        Transaction.query,
+        Transaction.date_transaction,
+        Transaction.id,
+        per_page=200
     )
 
     return render_template(
         "admin/transactions_list.html",
-        transactions=transactions
+        transactions=page.items,
+        page=page
     )
 
 @admin_tx.route("/<reference>")
@@ -206,6 +206,7 @@ def mon_solde():
                 user_id=user.id,
                 type="depot",
                 montant=montant,
+                devise=compte.devise,
                 fournisseur="Simulation",
                 reference=str(uuid.uuid4())[:12],
                 statut="valide",
@@ -1,17 +1,30 @@
-from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for, current_app, Response
 from database import db
-from models import Rate, Conversion, Utilisateur, CompteSysteme
+from models import Conversion, Utilisateur
 from datetime import datetime
 import random
 import string
 from extensions import csrf
-from sqlalchemy import or_
+from services.rate_cache import RateCache
+from services.quote_service import QuoteService
+from services.event_stream import Broadcaster
+from services.search import ConversionSearch
+from services.approx_count import ApproximateCount
+from services.account_selector import SystemAccountSelector
+from services.query_budget import query_budget
 
 # 🟢 Blueprint
 convert = Blueprint('convert', __name__, url_prefix='/convert')
 
 MAX_PUBLIC_AMOUNT = 500000  # 500 000 CFA max pour non connectés
 
+# 📡 Un seul producteur par worker pour toutes les connexions SSE
+rates_stream = Broadcaster(
+    "taux",
+    lambda: RateCache.snapshot().as_dict(),
+    interval_setting="RATE_STREAM_POLL_SECONDS"
+)
+
 # ======================================================
 # 🔹 PAGE PRINCIPALE DE CONVERSION
 # ======================================================
@@ -47,16 +60,27 @@ def convertir():
             flash("Tous les champs sont obligatoires.", "warning")
             return redirect(url_for('convert.convertir'))
 
-        rate = Rate.query.filter_by(
-            from_currency=from_currency,
-            to_currency=to_currency
-        ).first()
+        quote_token = request.form.get('quote_token')
 
-        if not rate:
-            flash("❌ Taux non défini pour cette paire de devises.", "error")
-            return redirect(url_for('convert.convertir'))
+        if quote_token:
+            # 🔐 Cotation signée : le taux affiché est le taux appliqué
+            try:
+                quote = QuoteService.check_token(
+                    quote_token, montant, from_currency, to_currency
+                )
+            except ValueError as e:
+                flash(str(e), "warning")
+                return redirect(url_for('convert.convertir'))
 
-        montant_converti = round(montant * rate.rate, 2)
+            montant_converti = quote["montant_converti"]
+        else:
+            rate = RateCache.get(from_currency, to_currency)
+
+            if not rate:
+                flash("❌ Taux non défini pour cette paire de devises.", "error")
+                return redirect(url_for('convert.convertir'))
+
+            montant_converti = round(montant * rate.rate, 2)
 
         reference = "CVT-" + ''.join(
             random.choices(string.ascii_uppercase + string.digits, k=6)
@@ -109,30 +133,99 @@ def api_convertir():
     data = request.get_json(silent=True) or {}
 
     try:
-        montant = float(data.get('montant', 0))
-    except ValueError:
-        return jsonify({"error": "Montant invalide"}), 400
+        quote = QuoteService.quote(
+            data.get('montant', 0),
+            data.get('from_currency'),
+            data.get('to_currency')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    quote["quote_token"] = QuoteService.generate_token(
+        data.get('montant'),
+        data.get('from_currency'),
+        data.get('to_currency'),
+        quote["taux"]
+    )
+    quote["expire_dans"] = QuoteService.token_ttl()
 
-    if montant <= 0:
-        return jsonify({"error": "Montant invalide"}), 400
+    return jsonify(quote)
 
-    from_currency = data.get('from_currency')
-    to_currency = data.get('to_currency')
 
-    rate = Rate.query.filter_by(
-        from_currency=from_currency,
-        to_currency=to_currency
-    ).first()
+# ======================================================
+# 🔹 API AJAX – COTATIONS GROUPÉES
+# ======================================================
+@csrf.exempt  # volontaire : endpoint JS / partenaires
+@convert.route('/api/convertir/batch', methods=['POST'])
+def api_convertir_batch():
+    data = request.get_json(silent=True)
+
+    # Accepte {"quotes": [...]} ou directement une liste
+    items = data.get('quotes') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Liste de cotations manquante"}), 400
+
+    max_items = current_app.config.get(
+        "QUOTE_BATCH_MAX_ITEMS",
+        QuoteService.DEFAULT_BATCH_MAX
+    )
+    if len(items) > max_items:
+        return jsonify({
+            "error": f"Maximum {max_items} cotations par requête"
+        }), 413
 
-    if not rate:
-        return jsonify({"error": "Taux non défini pour cette paire."}), 400
+    return jsonify(QuoteService.quote_batch(items))
 
-    montant_converti = round(montant * rate.rate, 2)
 
-    return jsonify({
-        "taux": rate.rate,
-        "montant_converti": montant_converti
-    })
+# ======================================================
+# 🔹 API PUBLIQUE – TABLE DES TAUX (CACHEABLE)
+# ======================================================
+@convert.route('/api/taux', methods=['GET'])
+def api_taux():
+    """
+    Table complète des taux, cacheable par les clients et le reverse proxy :
+    ETag fort dérivé de la version, 304 sur If-None-Match.
+    """
+    snapshot = RateCache.snapshot()
+
+    response = jsonify(snapshot.as_dict())
+    response.set_etag(snapshot.etag())
+    response.headers["Cache-Control"] = (
+        f"public, max-age={current_app.config.get('RATE_HTTP_MAX_AGE', 30)}, "
+        f"stale-while-revalidate={current_app.config.get('RATE_HTTP_STALE_WHILE_REVALIDATE', 300)}"
+    )
+    return response.make_conditional(request)
+
+
+# ======================================================
+# 🔹 FLUX SSE – TAUX EN DIRECT
+# ======================================================
+@convert.route('/api/taux/stream')
+def api_taux_stream():
+    """
+    Pousse la table des taux à la connexion puis à chaque mise à jour
+    (admin.gerer_taux). La page calcule les cotations localement.
+    """
+    stream = rates_stream.subscribe(
+        current_app._get_current_object(),
+        event="taux",
+        max_age=current_app.config.get("RATE_STREAM_MAX_AGE", 300),
+        max_subscribers=current_app.config.get("RATE_STREAM_MAX_CLIENTS", 0)
+    )
+
+    if stream is None:
+        # Flux désactivé sur ce worker ou complet : sur un 204, EventSource
+        # ne se reconnecte pas et la page passe en polling sur /api/taux
+        return Response(status=204)
+
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # pas de buffering côté proxy
+        }
+    )
 
 
 # ======================================================
@@ -148,6 +241,9 @@ def confirmer_envoi_par_reference(reference):
     if conversion.statut != 'en_attente':
         return jsonify({"error": "Conversion déjà traitée."}), 400
 
+    compte_systeme = None
+    montant = conversion.montant_converti or 0.0
+
     try:
         mapping_pays = {
             "CFA": "SN",
@@ -155,12 +251,8 @@ def confirmer_envoi_par_reference(reference):
         }
         pays_cible = mapping_pays.get(conversion.to_currency)
 
-        compte_systeme = (
-            CompteSysteme.query
-            .filter_by(pays=pays_cible, actif=True)
-            .order_by(CompteSysteme.id.asc())
-            .first()
-        )
+        # Compte le moins engagé (solde / montants en cours), état en mémoire
+        compte_systeme = SystemAccountSelector.select(pays_cible, montant)
 
         if not compte_systeme:
             return jsonify({"error": "Aucun compte système actif disponible"}), 404
@@ -178,6 +270,11 @@ def confirmer_envoi_par_reference(reference):
         }), 200
 
     except Exception:
+        # Affectation non commitée : le montant ne compte plus comme en cours
+        if compte_systeme:
+            SystemAccountSelector.release(compte_systeme.id, montant)
+
+        db.session.rollback()
         conversion.statut = 'echoue'
         db.session.commit()
         return jsonify({"error": "Erreur lors du traitement"}), 500
@@ -188,6 +285,7 @@ def confirmer_envoi_par_reference(reference):
 # 🔹 HISTORIQUE UTILISATEUR (PAGINATION + RECHERCHE)
 # ======================================================
 @convert.route('/historique')
+@query_budget(5)
 def historique():
     if not session.get('user_id'):
         flash("Veuillez vous connecter.", "warning")
@@ -209,26 +307,22 @@ def historique():
     )
 
 
-    if search:
-        like = f"%{search}%"
-        query = query.filter(
-            or_(
-                Conversion.reference.like(like),
-                Conversion.from_currency.like(like),
-                Conversion.to_currency.like(like),
-                Conversion.sender_phone.like(like),
-                Conversion.receiver_phone.like(like),
-            )
-        )
+    # Index trigramme (pg_trgm / FTS5) : pas de scan complet à chaque frappe
+    query = ConversionSearch.apply(query, search)
 
     pagination = query.order_by(
         Conversion.date_conversion.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    ).paginate(page=page, per_page=per_page, error_out=False, count=False)
+
+    # Pas de COUNT(*) complet à chaque clic (services/approx_count.py)
+    total, count_exact = ApproximateCount.query_count(query, ("historique", user_id, search))
+    pagination.total = max(total, (page - 1) * per_page + len(pagination.items))
 
     return render_template(
         'historique.html',
         conversions=pagination.items,
         pagination=pagination,
+        count_exact=count_exact,
         search=search
     )
 
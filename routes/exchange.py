@@ -2,12 +2,18 @@ from flask import Blueprint, render_template, request, flash
 from flask import session
 from database import db
 from models import Rate
+from services.rate_cache import RateCache
+from services.rate_history import RateHistoryService
 
 exchange = Blueprint('exchange', __name__)
 
 
 def ensure_default_rates():
     """Crée des taux par défaut si absents (1 CFA = 14 GNF)."""
+    # ⚡ Chemin rapide : les deux paires sont déjà en cache
+    if RateCache.get('CFA', 'GNF') and RateCache.get('GNF', 'CFA'):
+        return
+
     r1 = Rate.query.filter_by(from_currency='CFA', to_currency='GNF').first()
     r2 = Rate.query.filter_by(from_currency='GNF', to_currency='CFA').first()
     changed = False
@@ -18,6 +24,10 @@ def ensure_default_rates():
         r2 = Rate(from_currency='GNF', to_currency='CFA', rate=1/14.0)
         db.session.add(r2); changed = True
     if changed:
+        for rate in (r1, r2):
+            if rate in db.session.new:
+                RateHistoryService.record(rate.from_currency, rate.to_currency, rate.rate)
+        RateCache.bump_version()
         db.session.commit()
 
 @exchange.route('/convertir', methods=['GET', 'POST'])
@@ -40,19 +50,17 @@ def convertir():
             flash("Montant invalide.")
         else:
             if pair == 'CFA_GNF':
-                rate = Rate.query.filter_by(from_currency='CFA', to_currency='GNF').first()
-                taux_utilise = rate.rate if rate else None
+                taux_utilise = RateCache.get_rate('CFA', 'GNF')
                 if taux_utilise:
                     resultat = val * taux_utilise
             else:
-                rate = Rate.query.filter_by(from_currency='GNF', to_currency='CFA').first()
-                taux_utilise = rate.rate if rate else None
+                taux_utilise = RateCache.get_rate('GNF', 'CFA')
                 if taux_utilise:
                     resultat = val * taux_utilise
 
     # Taux actuels pour affichage
-    rate_cfa_gnf = Rate.query.filter_by(from_currency='CFA', to_currency='GNF').first()
-    rate_gnf_cfa = Rate.query.filter_by(from_currency='GNF', to_currency='CFA').first()
+    rate_cfa_gnf = RateCache.get('CFA', 'GNF')
+    rate_gnf_cfa = RateCache.get('GNF', 'CFA')
 
     return render_template(
         'convert.html',
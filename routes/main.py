@@ -1,11 +1,12 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, session
 from database import db
-from models import Conversion, Rate, Transaction
+from models import Conversion, Transaction
 from datetime import datetime
 import uuid
 from paiements.models import Depot, Retrait, Notification
 from flask_login import login_required, current_user
 from paiements.services import generer_lien_whatsapp, message_support
+from services.rate_cache import RateCache
 
 
 
@@ -23,8 +24,8 @@ def accueil():
 
 @main.route('/conversion', methods=['GET', 'POST'])
 def conversion():
-    taux_cfa_gnf = Rate.query.filter_by(from_currency='CFA', to_currency='GNF').first()
-    taux_gnf_cfa = Rate.query.filter_by(from_currency='GNF', to_currency='CFA').first()
+    taux_cfa_gnf = RateCache.get('CFA', 'GNF')
+    taux_gnf_cfa = RateCache.get('GNF', 'CFA')
 
     montant_converti = None
 
@@ -13,6 +13,7 @@ from services.ledger_service import LedgerService
 from services.risk_engine import RiskEngine
 from services.alert_service import AlertService
 from services.constants import PaymentStatus
+from services.provider_health import ProviderHealth, ProviderUnavailable
 
 paiement = Blueprint('paiement', __name__, url_prefix='/paiement')
 
@@ -37,36 +38,20 @@ def paiement_orange():
         if not reference or not telephone:
             return jsonify({"error": "Données manquantes"}), 400
 
-        conversion = PaymentService.lock_conversion(reference)
-        montant = conversion.montant_initial
+        # Fournisseur dégradé : refus immédiat plutôt qu'une attente de 10 s
+        # (lecture seule : l'appel de test éventuel est pris par track())
+        ProviderHealth.check("Orange Money")
 
         provider = OrangeProvider()
+        return_url = url_for("paiement.orange_callback", _external=True)
 
-        payment = provider.init_payment(
-            amount=montant,
-            phone=telephone,
-            reference=conversion.reference,
-            return_url=url_for("paiement.orange_callback", _external=True)
+        # Phase 1 : conversion réservée et commitée, verrou libéré
+        intent = PaymentService.begin_payment(
+            reference, "Orange Money", telephone, data.get("quote_token")
         )
 
-        transaction = PaymentService.create_transaction(
-            conversion,
-            fournisseur="Orange Money",
-            montant=montant
-        )
-
-        PaymentService.create_paiement(
-            conversion,
-            transaction.reference,
-            telephone
-        )
-
-        db.session.commit()
-
-        return jsonify({
-            "success": True,
-            "payment_url": payment.get("payment_url")
-        })
+    except ProviderUnavailable as e:
+        return _provider_unavailable(e)
 
     except Exception as e:
         db.session.rollback()
@@ -75,9 +60,60 @@ def paiement_orange():
             "step": "paiement_orange"
         }), 500
 
+    # Appel fournisseur hors transaction SQL
+    try:
+        with ProviderHealth.track("Orange Money"):
+            payment = provider.init_payment(
+                amount=intent.montant,
+                phone=telephone,
+                reference=intent.transaction_reference,
+                return_url=return_url
+            )
+    except Exception as e:
+        return _initiation_failed(intent, e, "paiement_orange")
+
+    # Phase 2
+    PaymentService.record_initiation(intent, payment)
+
+    return jsonify({
+        "success": True,
+        "payment_url": payment.get("payment_url")
+    })
+
 
+def _provider_unavailable(error):
+    """Circuit ouvert : 503 immédiat, avec l'autre fournisseur s'il est disponible."""
+    alternatives = {"Orange Money": ("Wave", "paiement.paiement_wave"),
+                    "Wave": ("Orange Money", "paiement.paiement_orange")}
 
+    body = {"error": str(error), "provider_unavailable": error.provider}
+    name, endpoint = alternatives.get(error.provider, (None, None))
+    if name and ProviderHealth.status(name)["state"] == ProviderHealth.CLOSED:
+        body["alternative"] = {"provider": name, "url": url_for(endpoint)}
 
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def _initiation_failed(intent, error, step):
+    """Phase 2 en échec : compensation si l'échec est certain, sinon attente du callback."""
+    if isinstance(error, ProviderUnavailable):
+        # Circuit ouvert entre la phase 1 et l'appel : rien n'a été envoyé
+        PaymentService.compensate(intent, error)
+        return _provider_unavailable(error)
+
+    if PaymentService.is_definite_failure(error):
+        PaymentService.compensate(intent, error)
+        return jsonify({"error": str(error), "step": step}), 502
+
+    PaymentService.mark_uncertain(intent, error)
+    return jsonify({
+        "success": False,
+        "pending": True,
+        "message": "Paiement en cours de vérification auprès du fournisseur."
+    }), 202
 
 
 # ======================================================
@@ -170,6 +206,7 @@ def simuler(conversion_id):
         user_id=conversion.user_id,
         type="paiement",
         montant=conversion.montant_converti,
+        devise=conversion.to_currency,
         statut=PaymentStatus.VALIDE.value,
         fournisseur="Simulation",
         reference=ref,
@@ -198,35 +235,39 @@ def paiement_wave():
         return jsonify({"error": "Données manquantes"}), 400
 
     try:
-        conversion = PaymentService.lock_conversion(reference)
-        montant = conversion.montant_initial
+        ProviderHealth.check("Wave")
 
         provider = WaveProvider()
-        result = provider.create_payment(
-            amount=montant,
-            reference=conversion.reference,
-            return_url=url_for("paiement.wave_callback", _external=True)
-        )
-
-        transaction = PaymentService.create_transaction(
-            conversion,
-            fournisseur="Wave",
-            montant=montant
-        )
+        return_url = url_for("paiement.wave_callback", _external=True)
 
-        PaymentService.create_paiement(
-            conversion,
-            transaction.reference,
-            telephone
+        # Phase 1 : conversion réservée et commitée, verrou libéré
+        intent = PaymentService.begin_payment(
+            reference, "Wave", telephone, data.get("quote_token")
         )
 
-        db.session.commit()
-        return jsonify({"success": True, "payment_url": result["payment_url"]})
+    except ProviderUnavailable as e:
+        return _provider_unavailable(e)
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
+    # Appel fournisseur hors transaction SQL
+    try:
+        with ProviderHealth.track("Wave"):
+            result = provider.create_payment(
+                amount=intent.montant,
+                reference=intent.transaction_reference,
+                return_url=return_url,
+                idempotency_key=intent.idempotency_key
+            )
+    except Exception as e:
+        return _initiation_failed(intent, e, "paiement_wave")
+
+    # Phase 2
+    PaymentService.record_initiation(intent, result)
+    return jsonify({"success": True, "payment_url": result["payment_url"]})
+
 
 # ======================================================
 # 🌊 WAVE CALLBACK
@@ -0,0 +1,38 @@
+import sys
+import time
+
+from app import app
+from database import db
+from services.export_jobs import ExportJobService
+
+
+def run_export_worker(loop=False):
+    """
+    Traite les exports demandés depuis /admin/exports.
+    `python run_export_worker.py`        : vide la file puis s'arrête
+    `python run_export_worker.py --loop` : worker permanent
+    """
+    with app.app_context():
+        interval = app.config.get("EXPORT_POLL_SECONDS", 5)
+
+        while True:
+            try:
+                done = ExportJobService.run_pending()
+                if done:
+                    print(f"📤 {done} export(s) traité(s)")
+                ExportJobService.purge_expired()
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Erreur worker exports : {e}")
+                if not loop:
+                    raise
+            finally:
+                db.session.remove()
+
+            if not loop:
+                break
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    run_export_worker(loop="--loop" in sys.argv)
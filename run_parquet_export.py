@@ -0,0 +1,24 @@
+import sys
+
+from app import app
+from services.parquet_export import ParquetExport
+
+
+def run_parquet_export(tables=None, full=False):
+    """
+    Export Parquet incrémental pour l'analyse.
+    `python run_parquet_export.py`                   : toutes les tables, nouvelles lignes
+    `python run_parquet_export.py ledger paiement`   : tables choisies
+    `python run_parquet_export.py --full ledger`     : réécriture complète
+    """
+    with app.app_context():
+        for table in tables or ParquetExport.TABLES:
+            count = ParquetExport.run(table, full=full)
+            print(f"🧱 {table} : {count} ligne(s) exportée(s) (dernier id {ParquetExport.last_id(table)})")
+
+        print(f"\n✅ Fichiers dans {ParquetExport.export_dir()}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    run_parquet_export(args or None, full="--full" in sys.argv)
@@ -0,0 +1,37 @@
+import sys
+import time
+
+from app import app
+from database import db
+from services.payment_service import PaymentService
+
+
+def run_payment_sweep(loop=False):
+    """
+    Expire les initiations de paiement restées sans issue (aucun callback).
+    `python run_payment_sweep.py`        : un passage
+    `python run_payment_sweep.py --loop` : worker, un passage toutes les PAYMENT_SWEEP_INTERVAL_SECONDS
+    """
+    with app.app_context():
+        interval = app.config.get("PAYMENT_SWEEP_INTERVAL_SECONDS", 300)
+
+        while True:
+            try:
+                expired = PaymentService.expire_unconfirmed()
+                if expired:
+                    print(f"🧹 {expired} initiation(s) expirée(s)")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Erreur purge paiements : {e}")
+                if not loop:
+                    raise
+            finally:
+                db.session.remove()
+
+            if not loop:
+                break
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    run_payment_sweep(loop="--loop" in sys.argv)
@@ -0,0 +1,38 @@
+import sys
+import time
+
+from app import app
+from database import db
+from services.rollups import RollupService
+
+
+def run_rollups(loop=False):
+    """
+    Met à jour les agrégats temporels (table rollup).
+    `python run_rollups.py`        : un passage
+    `python run_rollups.py --loop` : worker, un passage toutes les ROLLUP_INTERVAL_SECONDS
+    """
+    with app.app_context():
+        interval = app.config.get("ROLLUP_INTERVAL_SECONDS", 60)
+
+        while True:
+            try:
+                refreshed = RollupService.run()
+                db.session.commit()
+                for source, start in refreshed.items():
+                    print(f"📈 {source} : recalculé depuis {start or 'le début'}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Erreur rollups : {e}")
+                if not loop:
+                    raise
+            finally:
+                db.session.remove()
+
+            if not loop:
+                break
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    run_rollups(loop="--loop" in sys.argv)
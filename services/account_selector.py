@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from database import db
+from models import CompteSysteme, Conversion, Parametre
+from services.constants import PaymentStatus
+
+
+CachedAccount = namedtuple("CachedAccount", ["id", "nom", "fournisseur", "pays", "solde"])
+
+
+class SystemAccountSelector:
+    """
+    Répartition des conversions entre les comptes système actifs d'un pays.
+
+    Choix du compte le moins engagé par rapport à son solde :
+        (montant en cours + montant de la conversion) / solde
+    parmi ceux dont le solde couvre ce total. Sinon (solde dépassé ou non
+    renseigné), le moins engagé en valeur absolue, puis tour à tour.
+
+    - comptes actifs et montants en cours (conversions `paiement_en_cours`)
+      chargés en mémoire une fois, pas à chaque requête
+    - version dans Parametre(cle="comptes_systeme_version"), incrémentée par
+      l'admin à chaque ajout / activation / suppression ; chaque worker la
+      relit au plus une fois par ACCOUNT_CACHE_REFRESH_SECONDS
+    - rechargement complet au moins toutes les ACCOUNT_CACHE_MAX_AGE secondes :
+      soldes et montants en cours resynchronisés avec la base
+    - entre deux chargements, les montants affectés par ce worker s'ajoutent
+      à son état local
+    """
+
+    VERSION_KEY = "comptes_systeme_version"
+    DEFAULT_REFRESH_SECONDS = 5
+    DEFAULT_MAX_AGE = 30
+
+    _accounts = None        # pays -> [CachedAccount]
+    _outstanding = {}       # compte id -> montant en cours
+    _version = None
+    _loaded_at = 0.0
+    _checked_at = 0.0
+    _turn = 0
+    _lock = threading.Lock()
+
+    # --------------------------------------------------
+    # 🎯 SÉLECTION
+    # --------------------------------------------------
+    @classmethod
+    def select(cls, pays, montant):
+        """
+        Retourne le CachedAccount retenu (ou None si aucun compte actif)
+        et compte `montant` comme en cours sur ce compte.
+        """
+        montant = float(montant or 0.0)
+
+        with cls._lock:
+            cls._refresh()
+
+            accounts = cls._accounts.get(pays) or []
+            if not accounts:
+                return None
+
+            cls._turn += 1
+            count = len(accounts)
+
+            def score(item):
+                index, account = item
+                outstanding = cls._outstanding.get(account.id, 0.0)
+                # Dernier critère : rotation, pour départager les égalités
+                turn = (index - cls._turn) % count
+                if account.solde > 0 and outstanding + montant <= account.solde:
+                    return 0, (outstanding + montant) / account.solde, outstanding, turn
+                # Solde dépassé : classé avec les comptes sans solde, sinon il
+                # resterait prioritaire quel que soit son engagement
+                return 1, 0.0, outstanding, turn
+
+            _, chosen = min(enumerate(accounts), key=score)
+            cls._outstanding[chosen.id] = cls._outstanding.get(chosen.id, 0.0) + montant
+            return chosen
+
+    @classmethod
+    def release(cls, account_id, montant):
+        """
+        Annule la réservation de select() quand l'affectation n'a pas été
+        commitée : sinon ce montant fantôme fausserait le choix jusqu'au
+        prochain rechargement.
+        """
+        with cls._lock:
+            if account_id in cls._outstanding:
+                cls._outstanding[account_id] = max(
+                    0.0, cls._outstanding[account_id] - float(montant or 0.0)
+                )
+
+    # --------------------------------------------------
+    # 🔁 INVALIDATION
+    # --------------------------------------------------
+    @classmethod
+    def bump_version(cls):
+        """
+        À appeler dans la même transaction que la modification d'un
+        CompteSysteme ; le commit reste à la charge de l'appelant.
+        """
+        version = Parametre.increment(cls.VERSION_KEY)
+        cls.invalidate()
+        return version
+
+    @classmethod
+    def invalidate(cls):
+        """Force un rechargement au prochain accès (worker courant)."""
+        cls._checked_at = 0.0
+        cls._loaded_at = 0.0
+
+    # --------------------------------------------------
+    # 🔧 INTERNE (sous cls._lock)
+    # --------------------------------------------------
+    @classmethod
+    def _refresh(cls):
+        config = current_app.config
+        now = time.monotonic()
+
+        if cls._accounts is not None and now - cls._loaded_at < config.get(
+            "ACCOUNT_CACHE_MAX_AGE", cls.DEFAULT_MAX_AGE
+        ):
+            if now - cls._checked_at < config.get(
+                "ACCOUNT_CACHE_REFRESH_SECONDS", cls.DEFAULT_REFRESH_SECONDS
+            ):
+                return
+            cls._checked_at = now
+            if cls._read_version() == cls._version:
+                return
+
+        cls._load()
+
+    @classmethod
+    def _read_version(cls):
+        valeur = (
+            db.session.query(Parametre.valeur)
+            .filter_by(cle=cls.VERSION_KEY)
+            .scalar()
+        )
+        return valeur or "0"
+
+    @classmethod
+    def _load(cls):
+        version = cls._read_version()
+
+        rows = (
+            db.session.query(
+                CompteSysteme.id,
+                CompteSysteme.nom,
+                CompteSysteme.fournisseur,
+                CompteSysteme.pays,
+                CompteSysteme.solde,
+            )
+            .filter(CompteSysteme.actif.is_(True))
+            .order_by(CompteSysteme.id)
+            .all()
+        )
+
+        accounts = {}
+        for row in rows:
+            accounts.setdefault(row.pays, []).append(
+                CachedAccount(row.id, row.nom, row.fournisseur, row.pays, row.solde or 0.0)
+            )
+
+        outstanding = dict(
+            db.session.query(
+                Conversion.compte_systeme_id,
+                func.coalesce(func.sum(Conversion.montant_converti), 0.0)
+            )
+            .filter(
+                Conversion.statut == PaymentStatus.EN_COURS.value,
+                Conversion.compte_systeme_id.isnot(None)
+            )
+            .group_by(Conversion.compte_systeme_id)
+            .all()
+        )
+
+        now = time.monotonic()
+        cls._accounts = accounts
+        cls._outstanding = {k: float(v) for k, v in outstanding.items()}
+        cls._version = version
+        cls._loaded_at = now
+        cls._checked_at = now
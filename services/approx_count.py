@@ -0,0 +1,108 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, literal_column, text
+
+from database import db
+
+
+class ApproximateCount:
+    """
+    Comptages bon marché pour les paginateurs et le tableau de bord.
+
+    - table entière : statistiques `pg_class.reltuples` sur PostgreSQL
+      (tenues à jour par ANALYZE / autovacuum), sinon COUNT exact mis en
+      cache APPROX_COUNT_TTL secondes
+    - requête filtrée : COUNT borné à APPROX_COUNT_EXACT_LIMIT lignes ;
+      un filtre étroit reste donc exact, un filtre large retombe sur un
+      COUNT exact mis en cache
+
+    Chaque méthode retourne (nombre, exact). Le cache est propre au worker.
+    """
+
+    DEFAULT_TTL = 60
+    DEFAULT_EXACT_LIMIT = 1000
+    MAX_ENTRIES = 1024
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    # --------------------------------------------------
+    # 🗂️ TABLE ENTIÈRE
+    # --------------------------------------------------
+    @classmethod
+    def table_count(cls, model):
+        table = model.__tablename__
+
+        if db.engine.dialect.name == "postgresql":
+            estimate = db.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": f'"{table}"'}
+            ).scalar()
+            # -1 : table jamais analysée ; petite table : le COUNT exact est gratuit
+            if estimate is not None and estimate >= cls._exact_limit():
+                return int(estimate), False
+
+        return cls._cached(
+            ("table", table),
+            lambda: db.session.query(func.count()).select_from(model).scalar()
+        )
+
+    # --------------------------------------------------
+    # 🔎 REQUÊTE FILTRÉE
+    # --------------------------------------------------
+    @classmethod
+    def query_count(cls, query, key):
+        """
+        `key` identifie la liste et ses filtres (ex. ("historique", user_id, search))
+        pour le cache des grands comptages.
+        """
+        query = query.order_by(None)
+        limit = cls._exact_limit()
+
+        bounded = (
+            query.with_entities(literal_column("1"))
+            .limit(limit + 1)
+            .subquery()
+        )
+        count = db.session.query(func.count()).select_from(bounded).scalar()
+        if count <= limit:
+            return count, True
+
+        total, exact = cls._cached(("query",) + tuple(key), query.count)
+        # Une valeur en cache ne descend jamais sous ce qu'on vient de voir
+        return max(total, count), exact
+
+    # --------------------------------------------------
+    # ⏱️ CACHE TTL
+    # --------------------------------------------------
+    @classmethod
+    def _cached(cls, key, compute):
+        now = time.monotonic()
+        entry = cls._cache.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0], False
+
+        value = compute()
+        ttl = current_app.config.get("APPROX_COUNT_TTL", cls.DEFAULT_TTL)
+
+        with cls._lock:
+            if len(cls._cache) >= cls.MAX_ENTRIES:
+                for k in [k for k, (_, expires) in cls._cache.items() if expires <= now]:
+                    del cls._cache[k]
+                if len(cls._cache) >= cls.MAX_ENTRIES:
+                    cls._cache.clear()
+            cls._cache[key] = (value, now + ttl)
+
+        # Calculé à l'instant : exact
+        return value, True
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def _exact_limit(cls):
+        return current_app.config.get("APPROX_COUNT_EXACT_LIMIT", cls.DEFAULT_EXACT_LIMIT)
@@ -1,24 +1,144 @@
-from models import Transaction, RiskLog, Refund
-from database import db
+import threading
+import time
+
+from flask import current_app
 from sqlalchemy import func
 
+from database import db
+from models import Utilisateur, Compte, RiskEvent, Refund
+from services.money import Money
+from services.stat_counters import StatCounters
+from services.approx_count import ApproximateCount
+
+
 class AdminDashboardService:
+    """
+    Compteurs du tableau de bord admin.
+
+    - compteurs par statut (transaction, conversion) lus dans
+      `stat_counter`, maintenus incrémentalement : O(1)
+    - comptages de tables approchés (ApproximateCount) et somme des soldes
+    - résultat partagé par toutes les requêtes admin du worker
+      pendant DASHBOARD_CACHE_TTL secondes
+    """
+
+    DEFAULT_TTL = 5
+
+    _stats = None
+    _computed_at = 0.0
+    _lock = threading.Lock()
+
+    # --------------------------------------------------
+    # 📊 STATISTIQUES (CACHE TTL)
+    # --------------------------------------------------
+    @classmethod
+    def stats(cls):
+        ttl = current_app.config.get("DASHBOARD_CACHE_TTL", cls.DEFAULT_TTL)
+
+        stats = cls._stats
+        if stats is not None and time.monotonic() - cls._computed_at < ttl:
+            return stats
+
+        with cls._lock:
+            # Une seule requête de calcul même si plusieurs admins arrivent ensemble
+            if cls._stats is None or time.monotonic() - cls._computed_at >= ttl:
+                cls._stats = cls.compute()
+                cls._computed_at = time.monotonic()
+            return cls._stats
+
+    @classmethod
+    def invalidate(cls):
+        cls._computed_at = 0.0
 
     @staticmethod
-    def snapshot():
+    def compute():
+        # Soldes affichés en FCFA : seuls les comptes dans la devise par défaut
+        fonds = (
+            db.session.query(func.coalesce(func.sum(Compte.solde_minor), 0))
+            .filter(Compte.devise == Money.DEFAULT_CURRENCY)
+            .scalar()
+        )
+
+        # Tables qui ne font que grossir : estimation au-delà de quelques milliers de lignes
+        users, _ = ApproximateCount.table_count(Utilisateur)
+        refunds, _ = ApproximateCount.table_count(Refund)
+        risks, _ = ApproximateCount.table_count(RiskEvent)
+
+        counters = StatCounters.read()
+        transactions = AdminDashboardService._by_status(counters["transaction"], with_volume=True)
+        conversions = AdminDashboardService._by_status(counters["conversion"])
+
+        return {
+            "users": users,
+            "fonds": Money.from_minor(fonds),
+            "refunds": refunds,
+            "risks": risks,
+            "transactions": transactions,
+            "conversions": conversions,
+        }
+
+    @staticmethod
+    def _by_status(counters, with_volume=False):
+        """
+        Mise en forme des compteurs d'un scope.
+        Les conversions mélangent plusieurs devises : pas de volume pour elles.
+        """
+        by_status = {}
+        volume = 0
+        for statut, counter in counters.items():
+            entry = {"count": counter["count"]}
+            if with_volume:
+                entry["volume"] = Money.from_minor(counter["volume_minor"])
+                volume += int(counter["volume_minor"])
+            by_status[statut] = entry
+
+        result = {
+            "total": sum(s["count"] for s in by_status.values()),
+            "by_status": by_status,
+        }
+        if with_volume:
+            result["volume"] = Money.from_minor(volume)
+        return result
+
+    # --------------------------------------------------
+    # 🔎 ACCÈS
+    # --------------------------------------------------
+    @staticmethod
+    def count(section, statut, stats=None):
+        stats = stats or AdminDashboardService.stats()
+        return stats[section]["by_status"].get(statut, {}).get("count", 0)
+
+    @staticmethod
+    def snapshot(stats=None):
+        """
+        Format attendu par admin_live.js (/admin/realtime/stats et /stream).
+        `stats` permet au producteur SSE de passer un calcul frais.
+        """
+        stats = stats or AdminDashboardService.stats()
+
+        def count(section, statut):
+            return AdminDashboardService.count(section, statut, stats)
+
         return {
             "transactions": {
-                "pending": Transaction.query.filter_by(statut="en_attente").count(),
-                "blocked": Transaction.query.filter_by(statut="bloque").count(),
-                "success": Transaction.query.filter_by(statut="valide").count(),
+                "pending": count("transactions", "en_attente"),
+                "blocked": count("transactions", "bloque"),
+                "success": count("transactions", "valide"),
+                "failed": count("transactions", "echoue"),
+                "total": stats["transactions"]["total"],
+            },
+            "conversions": {
+                "pending": count("conversions", "en_attente"),
             },
             "refunds": {
-                "total": Refund.query.count(),
+                "total": stats["refunds"],
             },
             "risks": {
-                "alerts": RiskLog.query.count()
+                "alerts": stats["risks"]
             },
             "volume": {
-                "total": db.session.query(func.sum(Transaction.montant)).scalar() or 0
-            }
+                "total": stats["transactions"]["volume"]
+            },
+            "users": stats["users"],
+            "fonds": stats["fonds"],
         }
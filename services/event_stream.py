@@ -0,0 +1,150 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+
+logger = logging.getLogger("africachange.stream")
+
+
+def format_sse(data, event=None):
+    """Formate un message Server-Sent Events."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    for line in json.dumps(data, default=str).splitlines():
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Broadcaster:
+    """
+    Diffusion SSE à coût constant :
+
+    - un seul thread producteur par worker, actif uniquement
+      tant qu'il y a au moins un abonné
+    - le producteur calcule la valeur toutes les `interval` secondes
+      et ne pousse aux abonnés que si elle a changé
+    - chaque connexion attend sur sa propre file (thread inactif,
+      aucune connexion DB tenue)
+    """
+
+    QUEUE_SIZE = 5
+
+    def __init__(self, name, producer, interval=2.0, interval_setting=None):
+        self.name = name
+        self.producer = producer
+        self.interval = interval
+        # Clé de app.config prioritaire sur `interval` (lue par le producteur)
+        self.interval_setting = interval_setting
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+        self._last = None
+
+    # --------------------------------------------------
+    # 📡 ABONNEMENT
+    # --------------------------------------------------
+    def subscribe(self, app, event=None, keepalive=15, max_age=300, max_subscribers=None):
+        """
+        Retourne un générateur SSE pour une connexion, ou None si le worker
+        a déjà `max_subscribers` connexions ouvertes.
+        `max_age` borne la durée de la connexion : EventSource
+        se reconnecte automatiquement (directive `retry`).
+        """
+        q = queue.Queue(maxsize=self.QUEUE_SIZE)
+
+        with self._lock:
+            if max_subscribers is not None and len(self._subscribers) >= max_subscribers:
+                return None
+            self._subscribers.add(q)
+            self._app = app
+            last = self._last
+            self._ensure_producer()
+
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+                if last is not None:
+                    yield format_sse(last, event)
+
+                deadline = time.monotonic() + max_age
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        payload = q.get(timeout=min(keepalive, remaining))
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield format_sse(payload, event)
+            finally:
+                with self._lock:
+                    self._subscribers.discard(q)
+
+        return stream()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    # --------------------------------------------------
+    # 🔧 PRODUCTEUR
+    # --------------------------------------------------
+    def _ensure_producer(self):
+        # appelé sous self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"sse-{self.name}",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    # Plus personne à l'écoute : on s'arrête
+                    self._thread = None
+                    self._last = None
+                    return
+                app = self._app
+
+            interval = self.interval
+            try:
+                with app.app_context():
+                    if self.interval_setting:
+                        interval = app.config.get(self.interval_setting, self.interval)
+                    payload = self.producer()
+            except Exception:
+                logger.exception("Producteur SSE %s en erreur", self.name)
+                payload = None
+
+            if payload is not None and payload != self._last:
+                self._last = payload
+                with self._lock:
+                    subscribers = list(self._subscribers)
+                for q in subscribers:
+                    self._push(q, payload)
+
+            time.sleep(interval)
+
+    @staticmethod
+    def _push(q, payload):
+        # Chaque message contient l'état complet : seul le dernier compte
+        try:
+            q.put_nowait(payload)
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass
@@ -0,0 +1,307 @@
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from openpyxl import Workbook
+
+from database import db
+from models import ExportJob
+from services.exports import EXPORTS
+
+
+logger = logging.getLogger("africachange.exports")
+
+
+class ExportJobService:
+    """
+    Exports lourds traités hors requête HTTP :
+
+    1. l'admin soumet une demande (submit) : ligne `export_job` en attente
+    2. run_export_worker.py la prend, écrit le fichier compressé sur disque
+       par lots (progression commitée à chaque lot)
+    3. l'admin suit la progression puis télécharge le fichier
+
+    Une demande identique (même type, format et filtres) encore en cours ou
+    terminée depuis moins de EXPORT_REUSE_SECONDS renvoie le même job.
+
+    Un job `en_cours` dont le worker est mort (aucun battement depuis
+    EXPORT_STALE_SECONDS) est remis en attente, puis passé en échec après
+    EXPORT_MAX_ATTEMPTS tentatives.
+    """
+
+    PENDING = "en_attente"
+    RUNNING = "en_cours"
+    DONE = "termine"
+    FAILED = "echoue"
+    EXPIRED = "expire"
+
+    PARAM_KEYS = ("date_from", "date_to", "statut")
+    BATCH_SIZE = 2000
+
+    # format -> (extension du fichier stocké, mimetype au téléchargement)
+    # XLSX est déjà une archive zip : pas de gzip supplémentaire
+    STORAGE = {
+        "csv": ("csv.gz", "application/gzip"),
+        "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    }
+
+    # --------------------------------------------------
+    # 📝 SOUMISSION
+    # --------------------------------------------------
+    @classmethod
+    def submit(cls, kind, fmt, args, user_id=None):
+        """
+        Retourne (job, réutilisé). Le commit reste à la charge de l'appelant.
+        Lève ValueError si la demande est invalide.
+        """
+        exporter = EXPORTS.get(kind)
+        if exporter is None:
+            raise ValueError(f"Export inconnu : {kind}")
+        if fmt not in cls.STORAGE:
+            raise ValueError(f"Format inconnu : {fmt}")
+
+        params = {k: args.get(k) for k in cls.PARAM_KEYS if args.get(k)}
+        exporter.parse_filters(params)  # validation immédiate des dates
+
+        params_hash = cls.params_hash(kind, fmt, params)
+        existing = cls._reusable(params_hash)
+        if existing is not None:
+            return existing, True
+
+        job = ExportJob(
+            kind=kind,
+            format=fmt,
+            params=params,
+            params_hash=params_hash,
+            status=cls.PENDING,
+            requested_by=user_id,
+        )
+        db.session.add(job)
+        return job, False
+
+    @staticmethod
+    def params_hash(kind, fmt, params):
+        raw = json.dumps([kind, fmt, params], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @classmethod
+    def _reusable(cls, params_hash):
+        reuse = current_app.config.get("EXPORT_REUSE_SECONDS", 3600)
+        since = datetime.utcnow() - timedelta(seconds=reuse)
+
+        candidates = (
+            ExportJob.query
+            .filter(
+                ExportJob.params_hash == params_hash,
+                ExportJob.status.in_([cls.PENDING, cls.RUNNING, cls.DONE]),
+                ExportJob.created_at >= since
+            )
+            .order_by(ExportJob.id.desc())
+            .all()
+        )
+        for job in candidates:
+            if job.status != cls.DONE or (job.file_path and os.path.exists(job.file_path)):
+                return job
+        return None
+
+    # --------------------------------------------------
+    # ⚙️ WORKER
+    # --------------------------------------------------
+    @classmethod
+    def claim_next(cls):
+        """Prend le plus ancien job en attente (sûr avec plusieurs workers sur PostgreSQL)."""
+        query = ExportJob.query.filter_by(status=cls.PENDING).order_by(ExportJob.id)
+        if db.engine.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        job = query.first()
+        if job is None:
+            db.session.rollback()
+            return None
+
+        job.status = cls.RUNNING
+        job.started_at = job.heartbeat_at = datetime.utcnow()
+        job.rows_done = 0
+        job.attempts = (job.attempts or 0) + 1
+        db.session.commit()
+        return job
+
+    @classmethod
+    def reclaim_stale(cls):
+        """
+        Reprend les jobs `en_cours` abandonnés (worker tué, machine redémarrée).
+        Sans cela, la déduplication de submit() renverrait indéfiniment ce job.
+        Retourne le nombre de jobs repris.
+        """
+        config = current_app.config
+        limit = datetime.utcnow() - timedelta(seconds=config.get("EXPORT_STALE_SECONDS", 900))
+        max_attempts = config.get("EXPORT_MAX_ATTEMPTS", 2)
+
+        jobs = ExportJob.query.filter(
+            ExportJob.status == cls.RUNNING,
+            db.func.coalesce(ExportJob.heartbeat_at, ExportJob.started_at) < limit
+        ).all()
+
+        for job in jobs:
+            logger.warning("Export %s abandonné (tentative %s)", job.id, job.attempts)
+            if (job.attempts or 0) >= max_attempts:
+                job.status = cls.FAILED
+                job.error = "Worker interrompu"
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = cls.PENDING
+                job.rows_done = 0
+
+        db.session.commit()
+        return len(jobs)
+
+    @classmethod
+    def run_pending(cls, limit=None):
+        """Traite les jobs en attente. Retourne le nombre de jobs traités."""
+        cls.reclaim_stale()
+
+        done = 0
+        while limit is None or done < limit:
+            job = cls.claim_next()
+            if job is None:
+                break
+            cls.run(job)
+            done += 1
+        return done
+
+    @classmethod
+    def run(cls, job):
+        exporter = EXPORTS[job.kind]
+        filters = exporter.parse_filters(job.params or {})
+
+        extension, _ = cls.STORAGE[job.format]
+        path = os.path.join(cls.export_dir(), f"{job.kind}_{job.id}.{extension}")
+        part = path + ".part"
+
+        try:
+            job.total_rows = exporter.count(filters)
+            job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+            if job.format == "csv":
+                cls._write_csv(job, exporter, filters, part)
+            else:
+                cls._write_xlsx(job, exporter, filters, part)
+
+            # Le fichier n'apparaît sous son nom final qu'une fois complet
+            os.replace(part, path)
+
+            job.status = cls.DONE
+            job.file_path = path
+            job.file_size = os.path.getsize(path)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Export %s en erreur", job.id)
+
+            if os.path.exists(part):
+                os.remove(part)
+
+            job.status = cls.FAILED
+            job.error = str(e)[:1000]
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+    @classmethod
+    def _progress(cls, job, count):
+        # Commit entre deux lots : la page admin voit l'avancement
+        job.rows_done += count
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+    @classmethod
+    def _write_csv(cls, job, exporter, filters, path):
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter=";")
+            f.write("\ufeff")  # BOM pour Excel
+            writer.writerow(exporter.headers())
+
+            for rows in exporter.batches(filters, cls.BATCH_SIZE):
+                writer.writerows(rows)
+                cls._progress(job, len(rows))
+
+    @classmethod
+    def _write_xlsx(cls, job, exporter, filters, path):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(exporter.SHEET_TITLE)
+        ws.append(exporter.headers())
+
+        for rows in exporter.batches(filters, cls.BATCH_SIZE):
+            for row in rows:
+                ws.append(row)
+            cls._progress(job, len(rows))
+
+        with open(path, "wb") as f:
+            wb.save(f)
+
+    # --------------------------------------------------
+    # 🧹 RÉTENTION
+    # --------------------------------------------------
+    @classmethod
+    def purge_expired(cls):
+        """Supprime les fichiers plus vieux que EXPORT_RETENTION_HOURS."""
+        hours = current_app.config.get("EXPORT_RETENTION_HOURS", 72)
+        limit = datetime.utcnow() - timedelta(hours=hours)
+
+        jobs = ExportJob.query.filter(
+            ExportJob.status == cls.DONE,
+            ExportJob.finished_at < limit
+        ).all()
+
+        for job in jobs:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            job.status = cls.EXPIRED
+
+        db.session.commit()
+        return len(jobs)
+
+    # --------------------------------------------------
+    # 📁 FICHIERS
+    # --------------------------------------------------
+    @staticmethod
+    def export_dir():
+        path = current_app.config.get("EXPORT_DIR") or os.path.join(
+            current_app.instance_path, "exports"
+        )
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @classmethod
+    def download_info(cls, job):
+        """(chemin, mimetype, nom de fichier) ou None si le fichier n'est pas prêt."""
+        if job.status != cls.DONE or not job.file_path or not os.path.exists(job.file_path):
+            return None
+
+        extension, mimetype = cls.STORAGE[job.format]
+        created = (job.created_at or datetime.utcnow()).strftime("%Y%m%d_%H%M%S")
+        return job.file_path, mimetype, f"{job.kind}_{created}.{extension}"
+
+    @staticmethod
+    def to_dict(job):
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "format": job.format,
+            "params": job.params or {},
+            "status": job.status,
+            "total_rows": job.total_rows,
+            "rows_done": job.rows_done,
+            "progress": job.progress,
+            "file_size": job.file_size,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
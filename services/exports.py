@@ -0,0 +1,272 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload
+
+from database import db
+from models import Conversion, Transaction, LedgerEntry
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _fmt_date(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+class TableExport:
+    """
+    Export d'une table à mémoire constante.
+
+    - curseur côté serveur (`yield_per`) : les lignes arrivent par lots
+    - relations chargées par jointure (pas de requête par ligne)
+    - CSV produit au fil de l'eau, XLSX en mode write-only (fichier
+      temporaire relu par blocs)
+
+    Les sous-classes déclarent le modèle, les colonnes et les filtres.
+    """
+
+    NAME = None
+    MODEL = None
+    SHEET_TITLE = None
+    DATE_COLUMN = None
+    STATUS_COLUMN = None        # None : filtre statut ignoré
+    EAGER = ()                  # relations many-to-one jointes
+
+    # (en-tête, extraction depuis une ligne)
+    COLUMNS = []
+
+    FORMATS = ("xlsx", "csv")
+
+    YIELD_PER = 1000
+    CSV_FLUSH_ROWS = 500
+    FILE_CHUNK_SIZE = 64 * 1024
+
+    # --------------------------------------------------
+    # 🔎 FILTRES
+    # --------------------------------------------------
+    @staticmethod
+    def parse_filters(args):
+        """date_from / date_to (AAAA-MM-JJ, bornes incluses) et statut."""
+        filters = {}
+        try:
+            if args.get("date_from"):
+                filters["date_from"] = datetime.strptime(args["date_from"], "%Y-%m-%d")
+            if args.get("date_to"):
+                filters["date_to"] = datetime.strptime(args["date_to"], "%Y-%m-%d") + timedelta(days=1)
+        except ValueError:
+            raise ValueError("Date invalide (format attendu : AAAA-MM-JJ)")
+
+        if args.get("statut"):
+            filters["statut"] = args["statut"]
+        return filters
+
+    @classmethod
+    def _where(cls, filters):
+        date_col = getattr(cls.MODEL, cls.DATE_COLUMN)
+        clauses = []
+        if filters.get("date_from"):
+            clauses.append(date_col >= filters["date_from"])
+        if filters.get("date_to"):
+            clauses.append(date_col < filters["date_to"])
+        if filters.get("statut") and cls.STATUS_COLUMN:
+            clauses.append(getattr(cls.MODEL, cls.STATUS_COLUMN) == filters["statut"])
+        return clauses
+
+    @classmethod
+    def _eager(cls):
+        return [joinedload(getattr(cls.MODEL, rel)) for rel in cls.EAGER]
+
+    @classmethod
+    def query(cls, filters):
+        # select() 2.0 : pas de dédoublonnage implicite, compatible yield_per
+        date_col = getattr(cls.MODEL, cls.DATE_COLUMN)
+        return (
+            select(cls.MODEL)
+            .options(*cls._eager())
+            .where(*cls._where(filters))
+            .order_by(date_col.desc(), cls.MODEL.id.desc())
+            .execution_options(yield_per=cls.YIELD_PER)
+        )
+
+    @classmethod
+    def count(cls, filters):
+        return db.session.scalar(
+            select(func.count(cls.MODEL.id)).where(*cls._where(filters))
+        )
+
+    @classmethod
+    def headers(cls):
+        return [header for header, _ in cls.COLUMNS]
+
+    @classmethod
+    def to_row(cls, obj):
+        return [getter(obj) for _, getter in cls.COLUMNS]
+
+    @classmethod
+    def rows(cls, filters):
+        for obj in db.session.scalars(cls.query(filters)):
+            yield cls.to_row(obj)
+
+    @classmethod
+    def batches(cls, filters, size=None):
+        """
+        Lots de lignes paginés sur l'id (requêtes courtes) :
+        l'appelant peut commiter entre deux lots sans casser de curseur.
+        """
+        size = size or cls.YIELD_PER
+        last_id = 0
+        while True:
+            objs = db.session.scalars(
+                select(cls.MODEL)
+                .options(*cls._eager())
+                .where(cls.MODEL.id > last_id, *cls._where(filters))
+                .order_by(cls.MODEL.id)
+                .limit(size)
+            ).all()
+            if not objs:
+                return
+
+            last_id = objs[-1].id
+            rows = [cls.to_row(obj) for obj in objs]
+            # Rien ne reste dans l'identity map : mémoire constante
+            for obj in objs:
+                db.session.expunge(obj)
+            yield rows
+
+    # --------------------------------------------------
+    # 📤 FORMATS
+    # --------------------------------------------------
+    @classmethod
+    def iter_csv(cls, filters):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=";")
+
+        # BOM : Excel ouvre le CSV en UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(cls.headers())
+
+        for i, row in enumerate(cls.rows(filters), start=1):
+            writer.writerow(row)
+            if i % cls.CSV_FLUSH_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue().encode("utf-8")
+
+    @classmethod
+    def write_xlsx(cls, filters, fileobj):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(cls.SHEET_TITLE)
+        ws.append(cls.headers())
+        for row in cls.rows(filters):
+            ws.append(row)
+        wb.save(fileobj)
+
+    @classmethod
+    def iter_xlsx(cls, filters):
+        # Le format zip impose d'écrire le classeur entier avant l'envoi :
+        # on passe par un fichier temporaire, jamais par la mémoire.
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                cls.write_xlsx(filters, tmp)
+
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(cls.FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    @classmethod
+    def filename(cls, fmt):
+        return f"{cls.NAME}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+    @classmethod
+    def stream(cls, fmt, filters):
+        """(générateur, mimetype, nom de fichier)"""
+        if fmt not in cls.FORMATS:
+            raise ValueError(f"Format inconnu : {fmt}")
+
+        if fmt == "csv":
+            return cls.iter_csv(filters), "text/csv; charset=utf-8", cls.filename(fmt)
+        return cls.iter_xlsx(filters), XLSX_MIMETYPE, cls.filename(fmt)
+
+
+class ConversionExport(TableExport):
+    NAME = "conversions"
+    MODEL = Conversion
+    SHEET_TITLE = "Conversions"
+    DATE_COLUMN = "date_conversion"
+    STATUS_COLUMN = "statut"
+    EAGER = ("compte_systeme",)
+
+    COLUMNS = [
+        ("ID", lambda c: c.id),
+        ("Utilisateur ID", lambda c: c.user_id),
+        ("Devise source", lambda c: c.from_currency),
+        ("Devise cible", lambda c: c.to_currency),
+        ("Montant initial", lambda c: c.montant_initial),
+        ("Montant converti", lambda c: c.montant_converti),
+        ("Téléphone envoyeur", lambda c: c.sender_phone),
+        ("Téléphone receveur", lambda c: c.receiver_phone),
+        ("Référence", lambda c: c.reference),
+        ("Date conversion", lambda c: _fmt_date(c.date_conversion)),
+        ("Statut", lambda c: c.statut),
+        ("Compte système", lambda c: c.compte_systeme.nom if c.compte_systeme else ""),
+    ]
+
+
+class TransactionExport(TableExport):
+    NAME = "transactions"
+    MODEL = Transaction
+    SHEET_TITLE = "Transactions"
+    DATE_COLUMN = "date_transaction"
+    STATUS_COLUMN = "statut"
+
+    COLUMNS = [
+        ("ID", lambda t: t.id),
+        ("Utilisateur ID", lambda t: t.user_id),
+        ("Type", lambda t: t.type),
+        ("Montant", lambda t: t.montant),
+        ("Statut", lambda t: t.statut),
+        ("Fournisseur", lambda t: t.fournisseur),
+        ("Référence", lambda t: t.reference),
+        ("Date transaction", lambda t: _fmt_date(t.date_transaction)),
+    ]
+
+
+class LedgerExport(TableExport):
+    NAME = "ledger"
+    MODEL = LedgerEntry
+    SHEET_TITLE = "Ledger"
+    DATE_COLUMN = "created_at"
+
+    COLUMNS = [
+        ("ID", lambda e: e.id),
+        ("Référence", lambda e: e.reference),
+        ("Transaction ID", lambda e: e.transaction_id),
+        ("Conversion ID", lambda e: e.conversion_id),
+        ("Compte", lambda e: e.compte),
+        ("Sens", lambda e: e.sens),
+        ("Montant", lambda e: e.montant),
+        ("Devise", lambda e: e.devise),
+        ("Fournisseur", lambda e: e.provider),
+        ("Description", lambda e: e.description),
+        ("Date", lambda e: _fmt_date(e.created_at)),
+    ]
+
+
+EXPORTS = {
+    export.NAME: export
+    for export in (ConversionExport, TransactionExport, LedgerExport)
+}
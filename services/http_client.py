@@ -0,0 +1,168 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+
+logger = logging.getLogger("africachange.http")
+
+
+class ProviderHTTP:
+    """
+    Client HTTP commun aux fournisseurs (Orange, Wave, WhatsApp…).
+
+    - une `requests.Session` par hôte : connexions keep-alive réutilisées,
+      plus de poignée de main TCP + TLS à chaque appel
+    - timeouts (connexion, lecture) toujours posés
+    - nouvelles tentatives avec backoff exponentiel et jitter complet,
+      uniquement pour les appels idempotents (GET… ou `idempotent=True`)
+    - latence de chaque appel journalisée et agrégée par hôte (stats())
+
+    Un POST de paiement n'est jamais rejoué : une erreur réseau après envoi
+    ne dit pas si le fournisseur a créé le paiement.
+    """
+
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    RETRY_STATUSES = {429, 502, 503, 504}
+    LATENCY_SAMPLES = 500
+
+    _sessions = {}
+    _stats = {}
+    _lock = threading.Lock()
+
+    # --------------------------------------------------
+    # 🌐 APPELS
+    # --------------------------------------------------
+    @classmethod
+    def get(cls, url, **kwargs):
+        return cls.request("GET", url, **kwargs)
+
+    @classmethod
+    def post(cls, url, **kwargs):
+        return cls.request("POST", url, **kwargs)
+
+    @classmethod
+    def request(cls, method, url, idempotent=None, **kwargs):
+        """
+        Même signature que requests.request. Les exceptions réseau remontent
+        après la dernière tentative ; le statut HTTP n'est pas vérifié.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in cls.IDEMPOTENT_METHODS
+
+        kwargs.setdefault("timeout", (
+            cls._setting("PROVIDER_HTTP_CONNECT_TIMEOUT"),
+            cls._setting("PROVIDER_HTTP_READ_TIMEOUT"),
+        ))
+
+        host = urlsplit(url).netloc
+        session = cls._session(host)
+        attempts = 1 + (cls._setting("PROVIDER_HTTP_RETRIES") if idempotent else 0)
+
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                cls._record(host, method, started, None, attempt)
+                if attempt == attempts:
+                    raise
+                logger.warning("%s %s : %s (tentative %s/%s)", method, host, e, attempt, attempts)
+            else:
+                cls._record(host, method, started, response.status_code, attempt)
+                if response.status_code not in cls.RETRY_STATUSES or attempt == attempts:
+                    return response
+                logger.warning(
+                    "%s %s : HTTP %s (tentative %s/%s)",
+                    method, host, response.status_code, attempt, attempts
+                )
+
+            time.sleep(cls._backoff(attempt))
+
+    @classmethod
+    def _backoff(cls, attempt):
+        # Jitter complet : les workers ne réessaient pas tous au même instant
+        base = cls._setting("PROVIDER_HTTP_BACKOFF")
+        cap = cls._setting("PROVIDER_HTTP_BACKOFF_MAX")
+        return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+    # --------------------------------------------------
+    # 🔌 SESSIONS
+    # --------------------------------------------------
+    @classmethod
+    def _session(cls, host):
+        session = cls._sessions.get(host)
+        if session is not None:
+            return session
+
+        with cls._lock:
+            session = cls._sessions.get(host)
+            if session is None:
+                size = cls._setting("PROVIDER_HTTP_POOL_SIZE")
+                # Les nouvelles tentatives sont gérées par request()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._sessions[host] = session
+            return session
+
+    @staticmethod
+    def _setting(name):
+        if has_app_context():
+            return current_app.config.get(name, getattr(Config, name))
+        return getattr(Config, name)
+
+    # --------------------------------------------------
+    # ⏱️ LATENCE
+    # --------------------------------------------------
+    @classmethod
+    def _record(cls, host, method, started, status, attempt):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "%s %s -> %s en %.0f ms (tentative %s)",
+            method, host, status or "erreur", elapsed_ms, attempt
+        )
+
+        with cls._lock:
+            stats = cls._stats.setdefault(host, {
+                "calls": 0,
+                "errors": 0,
+                "latencies": deque(maxlen=cls.LATENCY_SAMPLES),
+            })
+            stats["calls"] += 1
+            if status is None or status >= 500:
+                stats["errors"] += 1
+            stats["latencies"].append(elapsed_ms)
+
+    @classmethod
+    def stats(cls):
+        """Latences du worker courant par hôte (derniers LATENCY_SAMPLES appels)."""
+        with cls._lock:
+            snapshot = {
+                host: (s["calls"], s["errors"], sorted(s["latencies"]))
+                for host, s in cls._stats.items()
+            }
+
+        def percentile(values, p):
+            return round(values[min(len(values) - 1, int(len(values) * p))], 1) if values else None
+
+        return {
+            host: {
+                "calls": calls,
+                "errors": errors,
+                "p50_ms": percentile(latencies, 0.50),
+                "p95_ms": percentile(latencies, 0.95),
+                "p99_ms": percentile(latencies, 0.99),
+            }
+            for host, (calls, errors, latencies) in snapshot.items()
+        }
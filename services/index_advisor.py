@@ -0,0 +1,133 @@
+import json
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import db
+from services.query_budget import QueryInspector
+
+
+class IndexAdvisor:
+    """
+    Repère les requêtes réellement exécutées qui parcourent une table entière.
+
+    1. capture() enregistre chaque forme d'instruction (normalisée comme
+       QueryInspector) avec un exemple de paramètres et son nombre d'exécutions
+    2. analyze() rejoue EXPLAIN (PostgreSQL) ou EXPLAIN QUERY PLAN (SQLite)
+       sur chaque forme et relève les parcours séquentiels
+
+    Sur PostgreSQL le planificateur préfère un Seq Scan sur une petite table :
+    le rapport n'a de sens que sur une base de volumétrie réaliste.
+    """
+
+    EXPLAINABLE = ("select", "update", "delete", "with")
+
+    # SQLite : "SCAN conversion" = table entière ; "SCAN x USING INDEX" ou
+    # "SEARCH" passent par un index ; sous-requêtes et tables virtuelles ignorées
+    _SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+    # Catalogues système : hors sujet
+    SYSTEM_PREFIXES = ("sqlite_", "pg_")
+
+    # --------------------------------------------------
+    # 📥 CAPTURE
+    # --------------------------------------------------
+    @classmethod
+    @contextmanager
+    def capture(cls):
+        """
+        with IndexAdvisor.capture() as captured:
+            ... benchmark ...
+        captured : {forme: {"statement", "parameters", "count"}}
+        """
+        captured = {}
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if executemany or not statement.lstrip().lower().startswith(cls.EXPLAINABLE):
+                return
+            shape = QueryInspector.normalize(statement)
+            entry = captured.setdefault(
+                shape, {"statement": statement, "parameters": parameters, "count": 0}
+            )
+            entry["count"] += 1
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield captured
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+    # --------------------------------------------------
+    # 🔬 ANALYSE
+    # --------------------------------------------------
+    @classmethod
+    def analyze(cls, captured):
+        """
+        Liste des formes avec parcours séquentiel, les plus exécutées d'abord :
+        [{"statement", "count", "tables", "plan"}]
+        """
+        explain = {
+            "postgresql": cls._explain_postgresql,
+            "sqlite": cls._explain_sqlite,
+        }.get(db.engine.dialect.name)
+        if explain is None:
+            raise ValueError(f"Dialecte non supporté : {db.engine.dialect.name}")
+
+        findings = []
+
+        with db.engine.connect() as conn:
+            for shape, entry in sorted(captured.items(), key=lambda item: -item[1]["count"]):
+                try:
+                    tables, plan = explain(conn, entry)
+                except Exception as e:
+                    conn.rollback()
+                    findings.append({
+                        "statement": shape, "count": entry["count"],
+                        "tables": [], "plan": f"EXPLAIN impossible : {e}",
+                    })
+                    continue
+
+                if tables:
+                    findings.append({
+                        "statement": shape, "count": entry["count"],
+                        "tables": tables, "plan": plan,
+                    })
+
+            # EXPLAIN n'exécute rien, mais on ne laisse aucune transaction ouverte
+            conn.rollback()
+
+        return findings
+
+    @classmethod
+    def _explain_postgresql(cls, conn, entry):
+        raw = conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + entry["statement"], entry["parameters"]
+        ).scalar()
+        plan = raw if isinstance(raw, list) else json.loads(raw)
+
+        tables = []
+
+        def walk(node):
+            relation = node.get("Relation Name") or ""
+            if node.get("Node Type") == "Seq Scan" and not relation.startswith(cls.SYSTEM_PREFIXES):
+                tables.append(f"{relation} (~{int(node.get('Plan Rows', 0))} lignes)")
+            for child in node.get("Plans", []):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        return tables, json.dumps(plan[0]["Plan"], indent=2)
+
+    @classmethod
+    def _explain_sqlite(cls, conn, entry):
+        rows = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + entry["statement"], entry["parameters"]
+        ).all()
+
+        tables = []
+        for row in rows:
+            match = cls._SQLITE_SCAN.match(row[3])
+            if match and not match.group(1).startswith(cls.SYSTEM_PREFIXES):
+                tables.append(match.group(1))
+        return tables, "\n".join(row[3] for row in rows)
@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows (développement) : verrou limité au processus
+    fcntl = None
+
+
+class LocalStore:
+    """
+    Petit magasin clé/valeur partagé par les workers gunicorn d'une même
+    machine : fichier SQLite (mode WAL) + verrous fichier (flock).
+
+    - get / set / delete : valeurs JSON avec expiration optionnelle
+    - lock(nom) : section critique inter-processus (single-flight)
+
+    Sert aux états qui doivent survivre d'une requête à l'autre sans
+    toucher la base principale (jetons OAuth, santé des fournisseurs).
+    """
+
+    DEFAULT_FILENAME = "local_store.sqlite"
+    BUSY_TIMEOUT = 5
+
+    _local = threading.local()
+    _thread_locks = {}
+    _thread_locks_guard = threading.Lock()
+
+    # --------------------------------------------------
+    # 📁 FICHIER
+    # --------------------------------------------------
+    @staticmethod
+    def path():
+        path = current_app.config.get("LOCAL_STORE_PATH") or os.path.join(
+            current_app.instance_path, LocalStore.DEFAULT_FILENAME
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return path
+
+    @classmethod
+    def _connection(cls):
+        path = cls.path()
+        connections = getattr(cls._local, "connections", None)
+        if connections is None:
+            connections = cls._local.connections = {}
+
+        # Une connexion par thread et par fichier (sqlite3 n'est pas partageable)
+        conn = connections.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=cls.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS store ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            connections[path] = conn
+        return conn
+
+    # --------------------------------------------------
+    # 🔑 CLÉ / VALEUR
+    # --------------------------------------------------
+    @classmethod
+    def get(cls, key):
+        row = cls._connection().execute(
+            "SELECT value, expires_at FROM store WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return json.loads(value)
+
+    @classmethod
+    def set(cls, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        cls._connection().execute(
+            "INSERT INTO store (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), expires_at)
+        )
+
+    @classmethod
+    def delete(cls, key):
+        cls._connection().execute("DELETE FROM store WHERE key = ?", (key,))
+
+    # --------------------------------------------------
+    # 🔒 VERROU INTER-PROCESSUS
+    # --------------------------------------------------
+    @classmethod
+    @contextmanager
+    def lock(cls, name):
+        """
+        Exclusion entre threads (verrou mémoire) puis entre processus
+        (flock sur <fichier>.<nom>.lock).
+        """
+        with cls._thread_locks_guard:
+            thread_lock = cls._thread_locks.setdefault(name, threading.Lock())
+
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+
+            with open(f"{cls.path()}.{name}.lock", "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
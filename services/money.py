@@ -0,0 +1,63 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+
+class Money:
+    """
+    Représentation des montants en unités mineures entières.
+
+    Les colonnes *_minor (BigInteger) doublent les colonnes Float :
+    agrégats exacts en base (SUM sur des entiers), plus de dérive d'arrondi.
+    """
+
+    # Nombre de décimales par devise (ISO 4217)
+    CURRENCY_DECIMALS = {
+        "XOF": 0,
+        "CFA": 0,   # alias interne de XOF
+        "XAF": 0,
+        "GNF": 0,
+        "EUR": 2,
+        "USD": 2,
+    }
+    DEFAULT_DECIMALS = 2
+
+    # Devise des montants qui n'en portent pas (Transaction, Compte, ledger)
+    DEFAULT_CURRENCY = "XOF"
+
+    COUNTRY_CURRENCY = {
+        "SN": "XOF",
+        "CI": "XOF",
+        "ML": "XOF",
+        "GN": "GNF",
+    }
+
+    @staticmethod
+    def decimals(currency):
+        return Money.CURRENCY_DECIMALS.get(
+            (currency or "").upper(),
+            Money.DEFAULT_DECIMALS
+        )
+
+    @staticmethod
+    def to_minor(amount, currency=None):
+        """Float/Decimal -> entier en unités mineures (arrondi commercial)."""
+        if amount is None:
+            return None
+
+        currency = currency or Money.DEFAULT_CURRENCY
+        factor = Decimal(10) ** Money.decimals(currency)
+        value = (Decimal(str(amount)) * factor).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        return int(value)
+
+    @staticmethod
+    def from_minor(minor, currency=None):
+        """Entier en unités mineures -> float pour l'affichage."""
+        if minor is None:
+            return None
+
+        currency = currency or Money.DEFAULT_CURRENCY
+        decimals = Money.decimals(currency)
+        return float(Decimal(int(minor)).scaleb(-decimals))
+
+    @staticmethod
+    def currency_for_country(pays):
+        return Money.COUNTRY_CURRENCY.get((pays or "").upper(), Money.DEFAULT_CURRENCY)
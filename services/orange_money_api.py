@@ -1,7 +1,9 @@
-import requests
 import os
 import base64
 
+from services.http_client import ProviderHTTP
+from services.token_cache import TokenCache
+
 class OrangeMoneyAPI:
     def __init__(self):
         self.client_id = os.getenv("ORANGE_CLIENT_ID")
@@ -18,6 +20,17 @@ class OrangeMoneyAPI:
     # 1) Obtenir le token correctement (réparé)
     # --------------------------------------------------
     def get_token(self):
+        # Jeton partagé entre requêtes et workers, renouvelé avant expiration
+        try:
+            return TokenCache.get(self._token_key(), self._request_token)
+        except Exception as e:
+            print("Erreur Token:", e)
+            return None
+
+    def _token_key(self):
+        return f"{self.token_url}|{self.client_id}"
+
+    def _request_token(self):
         # Encodage Base64 : client_id:client_secret
         auth_string = f"{self.client_id}:{self.client_secret}"
         auth_base64 = base64.b64encode(auth_string.encode()).decode()
@@ -29,13 +42,12 @@ class OrangeMoneyAPI:
 
         data = {"grant_type": "client_credentials"}
 
-        r = requests.post(self.token_url, headers=headers, data=data)
+        r = ProviderHTTP.post(self.token_url, headers=headers, data=data, idempotent=True)
 
         if r.status_code != 200:
-            print("Erreur Token:", r.text)
-            return None
+            raise Exception(r.text)
 
-        return r.json().get("access_token")
+        return r.json()
 
     # --------------------------------------------------
     # 2) Initialisation du paiement
@@ -54,12 +66,16 @@ class OrangeMoneyAPI:
             "payer_phone": phone_number
         }
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        headers = {"Content-Type": "application/json"}
 
-        r = requests.post(self.payment_url, headers=headers, json=payload)
+        # Jeton révoqué (401) : renouvelé puis un seul rejeu
+        r = TokenCache.authorized(
+            self._token_key(),
+            self.get_token,
+            lambda token: ProviderHTTP.post(
+                self.payment_url, headers={**headers, "Authorization": f"Bearer {token}"}, json=payload
+            )
+        )
 
         if r.status_code == 201:
             return {
@@ -80,10 +96,13 @@ class OrangeMoneyAPI:
         if not token:
             return {"success": False, "error": "Token invalide"}
 
-        headers = {"Authorization": f"Bearer {token}"}
         url = f"{self.status_url}/{order_id}"
 
-        r = requests.get(url, headers=headers)
+        r = TokenCache.authorized(
+            self._token_key(),
+            self.get_token,
+            lambda token: ProviderHTTP.get(url, headers={"Authorization": f"Bearer {token}"})
+        )
 
         if r.status_code != 200:
             return {"success": False, "error": r.text}
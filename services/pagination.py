@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+
+class KeysetPage:
+    """Une page de résultats et les curseurs vers ses voisines."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class KeysetPagination:
+    """
+    Pagination par curseur (keyset) sur (date, id), du plus récent au plus ancien.
+
+    Au lieu d'un OFFSET qui relit toutes les lignes précédentes, chaque page
+    repart de la clé de la dernière ligne vue :
+        WHERE (date, id) < (:date, :id) ORDER BY date DESC, id DESC LIMIT n
+    Avec l'index composite (date, id), le coût d'une page est constant
+    quelle que soit sa profondeur, et les pages restent stables quand de
+    nouvelles lignes arrivent.
+
+    Curseurs opaques dans l'URL : ?after=… (page suivante), ?before=… (précédente).
+    """
+
+    DEFAULT_PER_PAGE = 50
+    MAX_PER_PAGE = 200
+
+    # --------------------------------------------------
+    # 🔐 CURSEURS
+    # --------------------------------------------------
+    @staticmethod
+    def encode_cursor(date_value, id_value):
+        payload = [date_value.isoformat() if date_value else None, id_value]
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            date_value, id_value = json.loads(raw)
+            return (datetime.fromisoformat(date_value) if date_value else None), int(id_value)
+        except (ValueError, TypeError):
+            raise ValueError("Curseur de pagination invalide")
+
+    # --------------------------------------------------
+    # 📄 PAGINATION
+    # --------------------------------------------------
+    @classmethod
+    def paginate(cls, query, date_column, id_column, after=None, before=None, per_page=None):
+        """
+        `date_column` peut être None : pagination sur l'id seul.
+        Un curseur invalide renvoie la première page.
+        """
+        per_page = min(per_page or cls.DEFAULT_PER_PAGE, cls.MAX_PER_PAGE)
+
+        def key(obj):
+            date_value = getattr(obj, date_column.key) if date_column is not None else None
+            return cls.encode_cursor(date_value, getattr(obj, id_column.key))
+
+        def position(cursor):
+            date_value, id_value = cls.decode_cursor(cursor)
+            if date_column is None:
+                return id_column, id_value
+            return tuple_(date_column, id_column), tuple_(date_value, id_value)
+
+        order = [id_column] if date_column is None else [date_column, id_column]
+
+        try:
+            if before:
+                # Page précédente : on remonte dans l'ordre croissant puis on inverse
+                column, value = position(before)
+                rows = (
+                    query
+                    .filter(column > value)
+                    .order_by(*[c.asc() for c in order])
+                    .limit(per_page + 1)
+                    .all()
+                )
+                has_more = len(rows) > per_page
+                items = list(reversed(rows[:per_page]))
+                return KeysetPage(
+                    items,
+                    next_cursor=key(items[-1]) if items else None,
+                    prev_cursor=key(items[0]) if items and has_more else None,
+                )
+
+            if after:
+                column, value = position(after)
+                query = query.filter(column < value)
+        except ValueError:
+            after = None
+
+        rows = (
+            query
+            .order_by(*[c.desc() for c in order])
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        return KeysetPage(
+            items,
+            next_cursor=key(items[-1]) if items and has_more else None,
+            prev_cursor=key(items[0]) if items and after else None,
+        )
+
+    @classmethod
+    def from_request(cls, query, date_column, id_column, per_page=None):
+        """paginate() avec les curseurs ?after= / ?before= de la requête courante."""
+        return cls.paginate(
+            query,
+            date_column,
+            id_column,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            per_page=per_page,
+        )
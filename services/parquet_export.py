@@ -0,0 +1,215 @@
+import os
+
+from flask import current_app
+from sqlalchemy import select
+
+from database import db
+from models import LedgerEntry, Transaction, Paiement, Parametre
+from services.rate_history import _naive_utc
+
+
+def _arrow():
+    """pyarrow n'est chargé que par les exports analytiques (pas par l'app web)."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Export Parquet indisponible : installez pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetExport:
+    """
+    Export colonne (Parquet) pour l'analyse (pandas, DuckDB…).
+
+    - un dossier par table, partitionné par jour :
+      <PARQUET_EXPORT_DIR>/<table>/date=AAAA-MM-JJ/part-<premier id>-<dernier id>.parquet
+    - devise / fournisseur / statut encodés en dictionnaire
+    - ajout incrémental : seules les lignes d'id > dernier id exporté
+      (Parametre `parquet_last_id_<table>`) sont écrites, en nouveaux fichiers
+
+    Les lignes déjà exportées ne sont pas réécrites : un changement de statut
+    ultérieur n'apparaît qu'après `run(table, full=True)`.
+    Les numéros de téléphone ne sont pas exportés.
+    """
+
+    # table -> (modèle, colonne date, [(colonne, type arrow)])
+    # type arrow : "int", "float", "string", "dict", "timestamp"
+    TABLES = {
+        "ledger": (LedgerEntry, "created_at", [
+            ("id", "int"),
+            ("reference", "string"),
+            ("transaction_id", "int"),
+            ("conversion_id", "int"),
+            ("paiement_id", "int"),
+            ("compte", "dict"),
+            ("sens", "dict"),
+            ("montant", "float"),
+            ("montant_minor", "int"),
+            ("devise", "dict"),
+            ("provider", "dict"),
+            ("description", "string"),
+            ("created_at", "timestamp"),
+        ]),
+        "transaction": (Transaction, "date_transaction", [
+            ("id", "int"),
+            ("user_id", "int"),
+            ("type", "dict"),
+            ("montant", "float"),
+            ("montant_minor", "int"),
+            ("devise", "dict"),
+            ("statut", "dict"),
+            ("fournisseur", "dict"),
+            ("reference", "string"),
+            ("date_transaction", "timestamp"),
+        ]),
+        "paiement": (Paiement, "date_paiement", [
+            ("id", "int"),
+            ("conversion_id", "int"),
+            ("montant_envoye", "float"),
+            ("montant_recu", "float"),
+            ("devise_source", "dict"),
+            ("devise_cible", "dict"),
+            ("statut", "dict"),
+            ("transaction_reference", "string"),
+            ("date_paiement", "timestamp"),
+        ]),
+    }
+
+    WATERMARK_KEY = "parquet_last_id_{}"
+    BATCH_SIZE = 50000
+
+    # --------------------------------------------------
+    # 🔁 EXPORT INCRÉMENTAL
+    # --------------------------------------------------
+    @classmethod
+    def run(cls, table, full=False):
+        """
+        Exporte les nouvelles lignes de `table`. Le watermark est commité
+        après chaque lot : une interruption reprend au dernier lot écrit.
+        Retourne le nombre de lignes exportées.
+        """
+        if table not in cls.TABLES:
+            raise ValueError(f"Table inconnue : {table}")
+
+        pa, pq = _arrow()
+        model, date_column, columns = cls.TABLES[table]
+        schema = cls.schema(pa, columns)
+        root = os.path.join(cls.export_dir(), table)
+
+        if full:
+            cls._clear(root)
+            cls._set_last_id(table, 0)
+            db.session.commit()
+
+        last_id = cls.last_id(table)
+        exported = 0
+        attrs = [getattr(model, name) for name, _ in columns]
+
+        while True:
+            rows = db.session.execute(
+                select(*attrs)
+                .where(model.id > last_id)
+                .order_by(model.id)
+                .limit(cls.BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            for day, day_rows in cls._by_day(rows, columns, date_column).items():
+                cls._write(pa, pq, schema, root, day, day_rows, columns)
+
+            last_id = rows[-1].id
+            exported += len(rows)
+            cls._set_last_id(table, last_id)
+            db.session.commit()
+
+        return exported
+
+    @classmethod
+    def schema(cls, pa, columns):
+        types = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "string": pa.string(),
+            # Peu de valeurs distinctes : stockage en dictionnaire (catégories pandas)
+            "dict": pa.dictionary(pa.int32(), pa.string()),
+            "timestamp": pa.timestamp("us"),
+        }
+        return pa.schema([(name, types[kind]) for name, kind in columns])
+
+    @staticmethod
+    def _by_day(rows, columns, date_column):
+        index = [name for name, _ in columns].index(date_column)
+        days = {}
+        for row in rows:
+            values = list(row)
+            values[index] = _naive_utc(values[index])
+            day = values[index].date().isoformat() if values[index] else "inconnue"
+            days.setdefault(day, []).append(values)
+        return days
+
+    @classmethod
+    def _write(cls, pa, pq, schema, root, day, rows, columns):
+        arrays = []
+        for i, (name, kind) in enumerate(columns):
+            values = [row[i] for row in rows]
+            field = schema.field(name)
+            if kind == "dict":
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+
+        partition = os.path.join(root, f"date={day}")
+        os.makedirs(partition, exist_ok=True)
+
+        # Nom déterministe : une reprise après interruption réécrit le même fichier
+        filename = f"part-{rows[0][0]:012d}-{rows[-1][0]:012d}.parquet"
+        path = os.path.join(partition, filename)
+        # Préfixe "." : ignoré par les lecteurs Parquet tant qu'il n'est pas renommé
+        tmp = os.path.join(partition, f".{filename}.part")
+
+        pq.write_table(
+            pa.Table.from_arrays(arrays, schema=schema),
+            tmp,
+            compression="zstd",
+            use_dictionary=[name for name, kind in columns if kind == "dict"],
+        )
+        os.replace(tmp, path)
+
+    # --------------------------------------------------
+    # 📌 WATERMARK
+    # --------------------------------------------------
+    @classmethod
+    def last_id(cls, table):
+        param = Parametre.query.filter_by(cle=cls.WATERMARK_KEY.format(table)).first()
+        return int(param.valeur) if param and param.valeur else 0
+
+    @classmethod
+    def _set_last_id(cls, table, value):
+        key = cls.WATERMARK_KEY.format(table)
+        param = Parametre.query.filter_by(cle=key).first()
+        if not param:
+            param = Parametre(cle=key)
+            db.session.add(param)
+        param.valeur = str(value)
+
+    # --------------------------------------------------
+    # 📁 FICHIERS
+    # --------------------------------------------------
+    @staticmethod
+    def export_dir():
+        path = current_app.config.get("PARQUET_EXPORT_DIR") or os.path.join(
+            current_app.instance_path, "parquet"
+        )
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _clear(root):
+        if not os.path.isdir(root):
+            return
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith((".parquet", ".part")):
+                    os.remove(os.path.join(dirpath, filename))
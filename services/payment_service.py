@@ -1,9 +1,28 @@
 from database import db
-from models import Conversion, Transaction, Paiement
-from datetime import datetime
-from flask import session
+from models import Conversion, Transaction, Paiement, PaymentEvent
+from datetime import datetime, timedelta
+from collections import namedtuple
+from flask import session, current_app
+import logging
 import uuid
+import requests
 from services.constants import PaymentStatus
+from services.quote_service import QuoteService
+
+
+logger = logging.getLogger("africachange.payments")
+
+
+# Valeurs figées en phase 1 : l'appel fournisseur ne relit rien en base
+PaymentIntent = namedtuple("PaymentIntent", [
+    "conversion_id",
+    "transaction_id",
+    "transaction_reference",
+    "paiement_id",
+    "idempotency_key",
+    "montant",
+    "fournisseur",
+])
 
 
 class PaymentService:
@@ -35,6 +54,31 @@ class PaymentService:
 
         return conversion
 
+    # ==================================================
+    # 🔐 COTATION SIGNÉE
+    # ==================================================
+    @staticmethod
+    def check_quote(conversion, quote_token):
+        """
+        Si un jeton de cotation est fourni, vérifie qu'il correspond
+        à la conversion (paire, montant, montant converti).
+        Aucun accès à la table Rate.
+        """
+        if not quote_token:
+            return None
+
+        quote = QuoteService.check_token(
+            quote_token,
+            conversion.montant_initial,
+            conversion.from_currency,
+            conversion.to_currency
+        )
+
+        if abs(quote["montant_converti"] - conversion.montant_converti) > 0.005:
+            raise ValueError("La conversion ne correspond pas à la cotation.")
+
+        return quote
+
     # ==================================================
     # 🧾 CREATE TRANSACTION
     # ==================================================
@@ -44,6 +88,7 @@ class PaymentService:
             user_id=conversion.user_id,
             type="paiement",
             montant=montant,
+            devise=conversion.from_currency,
             statut=PaymentStatus.EN_ATTENTE.value,
             fournisseur=fournisseur,
             reference=str(uuid.uuid4())[:12],
@@ -88,3 +133,169 @@ class PaymentService:
         if conversion.statut == PaymentStatus.EN_COURS.value:
             conversion.statut = PaymentStatus.ECHOUE.value
         db.session.commit()
+
+    # ==================================================
+    # 🚦 INITIATION EN DEUX PHASES
+    # ==================================================
+    # Phase 1 (begin_payment) : verrou court sur la conversion, passage en
+    #   paiement_en_cours, création transaction + paiement, COMMIT.
+    # Appel fournisseur : aucune transaction ni connexion SQL ouverte.
+    # Phase 2 : record_initiation (succès) ou compensate (échec certain).
+    # Un échec incertain (délai de lecture dépassé, connexion coupée après
+    # envoi, erreur 5xx, réponse illisible) laisse le paiement en cours :
+    # le callback tranchera, sinon expire_unconfirmed() après
+    # PAYMENT_UNCERTAIN_EXPIRY_MINUTES.
+
+    @staticmethod
+    def begin_payment(reference, fournisseur, telephone, quote_token=None) -> PaymentIntent:
+        conversion = PaymentService.lock_conversion(reference)
+        PaymentService.check_quote(conversion, quote_token)
+
+        montant = conversion.montant_initial
+        transaction = PaymentService.create_transaction(conversion, fournisseur, montant)
+        paiement = PaymentService.create_paiement(conversion, transaction.reference, telephone)
+        paiement.statut = PaymentStatus.EN_COURS.value
+        db.session.flush()
+
+        intent = PaymentIntent(
+            conversion_id=conversion.id,
+            transaction_id=transaction.id,
+            transaction_reference=transaction.reference,
+            paiement_id=paiement.id,
+            idempotency_key=paiement.idempotency_key,
+            montant=montant,
+            fournisseur=fournisseur,
+        )
+
+        # Libère le verrou de ligne et rend la connexion au pool
+        db.session.commit()
+        db.session.close()
+        return intent
+
+    @staticmethod
+    def is_definite_failure(error) -> bool:
+        """
+        True si le fournisseur n'a certainement pas créé le paiement :
+        connexion jamais établie ou requête refusée (4xx).
+        Tout le reste (5xx après les nouvelles tentatives, réponse 2xx
+        illisible, coupure après envoi…) est incertain : le POST a pu
+        être traité.
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if isinstance(error, requests.HTTPError):
+            status = error.response.status_code if error.response is not None else None
+            return status is not None and 400 <= status < 500
+        return False
+
+    @staticmethod
+    def record_initiation(intent: PaymentIntent, response):
+        PaymentService._log_event(intent, "initiation", response)
+        db.session.commit()
+
+    @staticmethod
+    def compensate(intent: PaymentIntent, error, event_type="initiation_echec"):
+        """
+        Annule la phase 1 après un échec certain : la conversion redevient
+        payable, la transaction est marquée échouée (trace conservée) et le
+        paiement supprimé (un seul paiement par conversion).
+        """
+        try:
+            conversion = (
+                db.session.query(Conversion)
+                .filter_by(id=intent.conversion_id)
+                .with_for_update()
+                .first()
+            )
+            transaction = db.session.get(Transaction, intent.transaction_id)
+
+            # Un callback a pu arriver entre-temps : on ne défait rien
+            if (
+                conversion and conversion.statut == PaymentStatus.EN_COURS.value
+                and (transaction is None or transaction.statut == PaymentStatus.EN_ATTENTE.value)
+            ):
+                conversion.statut = PaymentStatus.EN_ATTENTE.value
+                if transaction:
+                    transaction.statut = PaymentStatus.ECHOUE.value
+
+                paiement = db.session.get(Paiement, intent.paiement_id)
+                if paiement:
+                    db.session.delete(paiement)
+
+            PaymentService._log_event(intent, event_type, {"error": str(error)[:500]})
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Compensation impossible pour %s", intent.transaction_reference)
+            raise
+
+    @staticmethod
+    def mark_uncertain(intent: PaymentIntent, error):
+        logger.warning(
+            "Initiation %s incertaine (%s) : en attente du callback",
+            intent.transaction_reference, error
+        )
+        PaymentService._log_event(intent, "initiation_incertaine", {"error": str(error)[:500]})
+        db.session.commit()
+
+    # ==================================================
+    # 🧹 INITIATIONS NON CONFIRMÉES
+    # ==================================================
+    @staticmethod
+    def expire_unconfirmed():
+        """
+        Initiations jamais confirmées (issue incertaine, ou worker arrêté
+        entre les deux phases) : sans callback après
+        PAYMENT_UNCERTAIN_EXPIRY_MINUTES — au-delà de la durée de vie d'une
+        session de paiement fournisseur — la phase 1 est compensée et la
+        conversion redevient payable. Sans cela, lock_conversion refuserait
+        toute nouvelle tentative.
+        Retourne le nombre d'initiations expirées.
+        """
+        minutes = current_app.config.get("PAYMENT_UNCERTAIN_EXPIRY_MINUTES", 60)
+        cutoff = datetime.utcnow() - timedelta(minutes=minutes)
+
+        confirmed = db.session.query(PaymentEvent.transaction_reference).filter(
+            PaymentEvent.event_type.in_(["initiation", "callback"])
+        )
+        rows = (
+            db.session.query(Paiement, Transaction)
+            .join(Transaction, Transaction.reference == Paiement.transaction_reference)
+            .filter(
+                Paiement.statut == PaymentStatus.EN_COURS.value,
+                Transaction.statut == PaymentStatus.EN_ATTENTE.value,
+                Paiement.date_paiement < cutoff,
+                Paiement.transaction_reference.notin_(confirmed)
+            )
+            .all()
+        )
+        intents = [
+            PaymentIntent(
+                conversion_id=paiement.conversion_id,
+                transaction_id=transaction.id,
+                transaction_reference=transaction.reference,
+                paiement_id=paiement.id,
+                idempotency_key=paiement.idempotency_key,
+                montant=transaction.montant,
+                fournisseur=transaction.fournisseur,
+            )
+            for paiement, transaction in rows
+        ]
+
+        for intent in intents:
+            logger.warning("Initiation %s expirée sans callback", intent.transaction_reference)
+            PaymentService.compensate(
+                intent,
+                f"Aucun callback après {minutes} min",
+                event_type="initiation_expiree"
+            )
+        return len(intents)
+
+    @staticmethod
+    def _log_event(intent, event_type, payload):
+        db.session.add(PaymentEvent(
+            transaction_reference=intent.transaction_reference,
+            provider=intent.fournisseur,
+            event_type=event_type,
+            payload=payload,
+        ))
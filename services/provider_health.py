@@ -1,8 +1,236 @@
+import time
+from contextlib import contextmanager
+
+import requests
+from flask import current_app
+
+from services.local_store import LocalStore
+
+
+class ProviderUnavailable(Exception):
+    """Circuit ouvert : le fournisseur n'est pas appelé."""
+
+    def __init__(self, provider, retry_after):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(
+            f"{provider} est momentanément indisponible, réessayez dans {retry_after} s."
+        )
+
+
 class ProviderHealth:
+    """
+    Disjoncteur par fournisseur, partagé par les workers (LocalStore).
+
+    - fermé : les appels passent ; chaque résultat entre dans une fenêtre
+      glissante (PROVIDER_BREAKER_WINDOW_SECONDS)
+    - ouvert : plus d'appel pendant PROVIDER_BREAKER_OPEN_SECONDS, dès que
+      FAIL_LIMIT échecs consécutifs ou, sur au moins MIN_CALLS appels, un
+      taux d'échec >= PROVIDER_BREAKER_FAILURE_RATE. Un appel plus lent que
+      PROVIDER_BREAKER_SLOW_MS compte comme un échec.
+    - semi-ouvert : à l'expiration, un seul appel de test passe ;
+      succès -> fermé, échec -> ouvert de nouveau
+    """
+
     FAIL_LIMIT = 5
-    TIMEOUT = 300  # secondes
+    TIMEOUT = 60  # secondes d'ouverture
+    MIN_CALLS = 10
+    FAILURE_RATE = 0.5
+    WINDOW_SECONDS = 60
+    SLOW_MS = 8000
+    MAX_SAMPLES = 200
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # --------------------------------------------------
+    # 🚦 AUTORISATION
+    # --------------------------------------------------
+    @classmethod
+    def allow(cls, provider):
+        """
+        True si l'appel peut partir. À l'expiration de l'ouverture, prend
+        l'unique appel de test (état semi-ouvert) : à n'appeler que juste
+        avant l'appel fournisseur, dont track() enregistre le résultat.
+        """
+        state = cls._load(provider)
+        if state["state"] == cls.CLOSED:
+            return True
+
+        now = time.time()
+        if cls._blocked(state, now):
+            return False
+
+        # Ouverture expirée (ou test bloqué) : un seul worker obtient l'appel de test
+        with LocalStore.lock(cls._lock_name(provider)):
+            state = cls._load(provider)
+            if state["state"] == cls.CLOSED:
+                return True
+            if cls._blocked(state, now):
+                return False
+
+            state["state"] = cls.HALF_OPEN
+            state["probe_at"] = now
+            cls._save(provider, state)
+            return True
+
+    @classmethod
+    def check(cls, provider):
+        """
+        Refus rapide, sans effet sur l'état : lève ProviderUnavailable si le
+        circuit est ouvert ou si l'appel de test est en cours. Ne prend pas
+        l'appel de test (c'est le rôle de track()).
+        """
+        if cls._blocked(cls._load(provider), time.time()):
+            raise ProviderUnavailable(provider, cls.retry_after(provider))
+
+    @classmethod
+    def _blocked(cls, state, now):
+        if state["state"] == cls.OPEN:
+            return now < state["opened_at"] + cls._open_seconds()
+        if state["state"] == cls.HALF_OPEN:
+            return now < state["probe_at"] + cls._probe_seconds()
+        return False
+
+    @classmethod
+    def retry_after(cls, provider):
+        state = cls._load(provider)
+        if state["state"] == cls.OPEN:
+            return max(1, int(state["opened_at"] + cls._open_seconds() - time.time()))
+        if state["state"] == cls.HALF_OPEN:
+            return max(1, int(state["probe_at"] + cls._probe_seconds() - time.time()))
+        return 0
+
+    # --------------------------------------------------
+    # 📝 RÉSULTATS
+    # --------------------------------------------------
+    @classmethod
+    @contextmanager
+    def track(cls, provider):
+        """
+        with ProviderHealth.track("Wave"):
+            provider.create_payment(...)
+        Prend l'appel de test si le circuit est semi-ouvert ; lève
+        ProviderUnavailable avant tout appel si le circuit est ouvert.
+        Une erreur 4xx (requête refusée) ne compte pas contre le fournisseur.
+        """
+        if not cls.allow(provider):
+            raise ProviderUnavailable(provider, cls.retry_after(provider))
+
+        started = time.perf_counter()
+        try:
+            yield
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            cls.record(provider, status is not None and status < 500, cls._elapsed_ms(started))
+            raise
+        except Exception:
+            cls.record(provider, False, cls._elapsed_ms(started))
+            raise
+        else:
+            cls.record(provider, True, cls._elapsed_ms(started))
+
+    @classmethod
+    def record(cls, provider, success, latency_ms):
+        now = time.time()
+        config = current_app.config
+        window = config.get("PROVIDER_BREAKER_WINDOW_SECONDS", cls.WINDOW_SECONDS)
+        slow_ms = config.get("PROVIDER_BREAKER_SLOW_MS", cls.SLOW_MS)
+        ok = bool(success) and latency_ms < slow_ms
+
+        with LocalStore.lock(cls._lock_name(provider)):
+            state = cls._load(provider)
+
+            samples = [s for s in state["samples"] if s[0] > now - window]
+            samples.append([now, ok, round(latency_ms, 1)])
+            state["samples"] = samples[-cls.MAX_SAMPLES:]
+            state["consecutive_failures"] = 0 if ok else state["consecutive_failures"] + 1
+
+            if state["state"] == cls.HALF_OPEN:
+                # Résultat de l'appel de test
+                if ok:
+                    state.update(state=cls.CLOSED, samples=[], consecutive_failures=0)
+                else:
+                    state.update(state=cls.OPEN, opened_at=now)
+            elif state["state"] == cls.CLOSED and cls._should_open(state):
+                state.update(state=cls.OPEN, opened_at=now)
+
+            cls._save(provider, state)
+
+    @classmethod
+    def _should_open(cls, state):
+        config = current_app.config
+        fail_limit = config.get("PROVIDER_BREAKER_FAIL_LIMIT", cls.FAIL_LIMIT)
+        failure_rate = config.get("PROVIDER_BREAKER_FAILURE_RATE", cls.FAILURE_RATE)
+
+        if state["consecutive_failures"] >= fail_limit:
+            return True
+
+        samples = state["samples"]
+        if len(samples) < cls.MIN_CALLS:
+            return False
+        failures = sum(1 for _, ok, _ in samples if not ok)
+        return failures / len(samples) >= failure_rate
+
+    # --------------------------------------------------
+    # 📊 ÉTAT
+    # --------------------------------------------------
+    @classmethod
+    def status(cls, provider):
+        state = cls._load(provider)
+        samples = state["samples"]
+        latencies = sorted(latency for _, _, latency in samples)
+        return {
+            "state": state["state"],
+            "calls": len(samples),
+            "failures": sum(1 for _, ok, _ in samples if not ok),
+            "consecutive_failures": state["consecutive_failures"],
+            "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else None,
+            "retry_after": cls.retry_after(provider),
+        }
+
+    @classmethod
+    def reset(cls, provider):
+        with LocalStore.lock(cls._lock_name(provider)):
+            LocalStore.delete(cls._key(provider))
+
+    # --------------------------------------------------
+    # 🗂️ STOCKAGE
+    # --------------------------------------------------
+    @staticmethod
+    def _key(provider):
+        return f"health:{provider.lower().replace(' ', '_')}"
+
+    @staticmethod
+    def _lock_name(provider):
+        return f"health_{provider.lower().replace(' ', '_')}"
+
+    @classmethod
+    def _load(cls, provider):
+        return LocalStore.get(cls._key(provider)) or {
+            "state": cls.CLOSED,
+            "samples": [],
+            "consecutive_failures": 0,
+            "opened_at": 0,
+            "probe_at": 0,
+        }
+
+    @classmethod
+    def _save(cls, provider, state):
+        LocalStore.set(cls._key(provider), state)
+
+    @classmethod
+    def _open_seconds(cls):
+        return current_app.config.get("PROVIDER_BREAKER_OPEN_SECONDS", cls.TIMEOUT)
+
+    @staticmethod
+    def _probe_seconds():
+        # Un appel de test bloqué (worker tué) ne garde pas le circuit fermé aux autres
+        config = current_app.config
+        timeout = config.get("PROVIDER_HTTP_CONNECT_TIMEOUT", 3) + config.get("PROVIDER_HTTP_READ_TIMEOUT", 10)
+        return timeout + 5
 
     @staticmethod
-    def allow(provider):
-        # à brancher sur Redis plus tard
-        return True
+    def _elapsed_ms(started):
+        return (time.perf_counter() - started) * 1000
@@ -1,7 +1,9 @@
-import requests
 import base64
 import os
 
+from services.http_client import ProviderHTTP
+from services.token_cache import TokenCache
+
 class OrangeProvider:
 
     def __init__(self):
@@ -11,8 +13,13 @@ class OrangeProvider:
         self.payment_url = ""
 
     def get_access_token(self):
-        import base64, requests
+        # Jeton partagé entre requêtes et workers, renouvelé avant expiration
+        return TokenCache.get(self._token_key(), self._request_token)
+
+    def _token_key(self):
+        return f"{self.oauth_url}|{self.client_id}"
 
+    def _request_token(self):
         creds = f"{self.client_id}:{self.client_secret}"
         encoded = base64.b64encode(creds.encode()).decode()
 
@@ -21,18 +28,17 @@ class OrangeProvider:
             "Content-Type": "application/x-www-form-urlencoded",
         }
 
-        r = requests.post(
+        # Demande de jeton : rejouable sans effet de bord
+        r = ProviderHTTP.post(
             self.oauth_url,
             headers=headers,
             data={"grant_type": "client_credentials"},
-            timeout=10
+            idempotent=True
         )
         r.raise_for_status()
-        return r.json()["access_token"]
-
-    def init_payment(self, amount, phone, reference):
-        token = self.get_access_token()
+        return r.json()
 
+    def init_payment(self, amount, phone, reference, return_url=None):
         url = "https://api.sandbox.orange-sonatel.com/api/eWallet/v1/payments"
 
         payload = {
@@ -48,11 +54,19 @@ class OrangeProvider:
         }
 
         headers = {
-            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        if return_url:
+            headers["X-Callback-Url"] = return_url
 
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        # Jeton révoqué (401) : renouvelé puis un seul rejeu
+        r = TokenCache.authorized(
+            self._token_key(),
+            self.get_access_token,
+            lambda token: ProviderHTTP.post(
+                url, json=payload, headers={**headers, "Authorization": f"Bearer {token}"}
+            )
+        )
         r.raise_for_status()
 
         return {"status": "PENDING"}
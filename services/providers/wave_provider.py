@@ -1,6 +1,9 @@
 import os
+
 import requests
+
 from services.providers.base_provider import BaseProvider
+from services.http_client import ProviderHTTP
 
 
 class WaveProvider(BaseProvider):
@@ -15,11 +18,14 @@ class WaveProvider(BaseProvider):
     # --------------------------------------------------
     # 💳 INIT PAYMENT
     # --------------------------------------------------
-    def create_payment(self, *, amount: float, reference: str, return_url: str):
+    def create_payment(self, *, amount: float, reference: str, return_url: str, idempotency_key: str = None):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        if idempotency_key:
+            # Wave déduplique sur cette clé : l'appel peut être rejoué sans risque
+            headers["Idempotency-Key"] = idempotency_key
 
         payload = {
             "amount": int(amount),
@@ -29,10 +35,13 @@ class WaveProvider(BaseProvider):
             "cancel_redirect_url": return_url,
         }
 
-        r = requests.post(self.API_URL, headers=headers, json=payload, timeout=10)
+        r = ProviderHTTP.post(
+            self.API_URL, headers=headers, json=payload, idempotent=bool(idempotency_key)
+        )
 
         if r.status_code != 200:
-            raise RuntimeError(f"Wave error: {r.text}")
+            # HTTPError + réponse : un 4xx est un refus certain, un 5xx non
+            raise requests.HTTPError(f"Wave error: {r.text}", response=r)
 
         data = r.json()
 
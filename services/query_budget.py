@@ -0,0 +1,189 @@
+import logging
+import re
+import time
+from collections import Counter
+from functools import wraps
+
+from flask import (
+    g, request, current_app, has_request_context,
+    before_render_template, template_rendered
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger("africachange.queries")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée en mode strict (tests) quand un endpoint dépasse son budget."""
+
+
+def query_budget(max_queries):
+    """
+    Budget de requêtes SQL propre à une vue :
+
+        @admin.route("/transactions")
+        @admin_required
+        @query_budget(10)
+        def transactions(): ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            stats = QueryInspector._stats()
+            if stats is not None:
+                stats["budget"] = max_queries
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class QueryInspector:
+    """
+    Instrumentation SQL par requête HTTP :
+
+    - compte les requêtes exécutées (événement moteur `before_cursor_execute`)
+    - regroupe les instructions identiques aux paramètres près : une même
+      forme répétée QUERY_REPEAT_THRESHOLD fois signale un N+1
+    - repère les chargements paresseux de relations (`do_orm_execute`)
+    - rattache chaque requête au template en cours de rendu
+
+    Le rapport est journalisé avec l'endpoint (dépassement de budget ou
+    requêtes répétées) ; en mode strict (QUERY_BUDGET_STRICT, pour les
+    tests) un dépassement de budget lève QueryBudgetExceeded.
+    """
+
+    _installed = False
+
+    # Littéraux résiduels (SQL inliné) : remplacés pour regrouper les formes
+    _LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+    _IN_LISTS = re.compile(r"IN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+
+    @classmethod
+    def install(cls, app):
+        if not app.config.get("QUERY_BUDGET_ENABLED"):
+            return
+        if not cls._installed:
+            event.listen(Engine, "before_cursor_execute", cls._before_cursor_execute)
+            event.listen(Session, "do_orm_execute", cls._do_orm_execute)
+            cls._installed = True
+
+        before_render_template.connect(cls._before_render, app)
+        template_rendered.connect(cls._after_render, app)
+        app.before_request(cls._start)
+        app.after_request(cls._finish)
+
+    # --------------------------------------------------
+    # 📥 COLLECTE
+    # --------------------------------------------------
+    @staticmethod
+    def _stats():
+        if not has_request_context():
+            return None
+        return g.get("_query_stats")
+
+    @staticmethod
+    def _start():
+        g._query_stats = {
+            "count": 0,
+            "started": time.perf_counter(),
+            "statements": Counter(),
+            "lazy_loads": Counter(),
+            "templates": Counter(),
+            "template": None,
+            "budget": None,
+        }
+
+    @classmethod
+    def normalize(cls, statement):
+        statement = cls._IN_LISTS.sub("IN (…)", statement)
+        statement = cls._LITERALS.sub("?", statement)
+        return " ".join(statement.split())
+
+    @classmethod
+    def _before_cursor_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        stats = cls._stats()
+        if stats is None:
+            return
+        stats["count"] += 1
+        stats["statements"][cls.normalize(statement)] += 1
+        if stats["template"]:
+            stats["templates"][stats["template"]] += 1
+
+    @classmethod
+    def _do_orm_execute(cls, orm_execute_state):
+        stats = cls._stats()
+        if stats is None:
+            return
+        parent = orm_execute_state.lazy_loaded_from
+        if parent is not None:
+            target = orm_execute_state.bind_mapper
+            target = target.class_.__name__ if target is not None else "?"
+            stats["lazy_loads"][f"{parent.class_.__name__} -> {target}"] += 1
+
+    @classmethod
+    def _before_render(cls, sender, template, context, **extra):
+        stats = cls._stats()
+        if stats is not None:
+            stats["template"] = template.name
+
+    @classmethod
+    def _after_render(cls, sender, template, context, **extra):
+        stats = cls._stats()
+        if stats is not None:
+            stats["template"] = None
+
+    # --------------------------------------------------
+    # 📊 RAPPORT
+    # --------------------------------------------------
+    @classmethod
+    def report(cls, stats, threshold):
+        return {
+            "count": stats["count"],
+            "duration_ms": round((time.perf_counter() - stats["started"]) * 1000, 1),
+            "repeated": [
+                (statement, n)
+                for statement, n in stats["statements"].most_common()
+                if n >= threshold
+            ],
+            "lazy_loads": dict(stats["lazy_loads"]),
+            "templates": dict(stats["templates"]),
+        }
+
+    @classmethod
+    def _finish(cls, response):
+        stats = cls._stats()
+        if stats is None or request.endpoint in (None, "static"):
+            return response
+
+        config = current_app.config
+
+        budget = stats["budget"] or config.get("QUERY_BUDGET_DEFAULT", 50)
+        threshold = config.get("QUERY_REPEAT_THRESHOLD", 5)
+        report = cls.report(stats, threshold)
+
+        response.headers["X-Query-Count"] = str(report["count"])
+
+        over_budget = report["count"] > budget
+        if over_budget or report["repeated"]:
+            logger.warning(
+                "SQL %s : %s requêtes (budget %s) en %s ms | templates %s | "
+                "lazy loads %s | répétées %s",
+                request.endpoint,
+                report["count"],
+                budget,
+                report["duration_ms"],
+                report["templates"],
+                report["lazy_loads"],
+                [f"{n}× {statement[:120]}" for statement, n in report["repeated"][:5]],
+            )
+
+        if config.get("QUERY_BUDGET_STRICT") and over_budget:
+            raise QueryBudgetExceeded(
+                f"{request.endpoint} : {report['count']} requêtes (budget {budget}), "
+                f"répétées : {report['repeated'][:3]}, lazy loads : {report['lazy_loads']}"
+            )
+
+        return response
@@ -0,0 +1,153 @@
+import math
+import time
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from services.rate_cache import RateCache
+
+
+class QuoteService:
+    """
+    Calcul des cotations (montant converti) à partir du cache des taux.
+    Aucune requête SQL : tout est servi par un RateSnapshot.
+    """
+
+    DEFAULT_BATCH_MAX = 50
+    DEFAULT_TOKEN_TTL = 900  # secondes
+    TOKEN_SALT = "quote-token"
+
+    # --------------------------------------------------
+    # 🔹 COTATION UNIQUE
+    # --------------------------------------------------
+    @staticmethod
+    def parse_amount(value):
+        try:
+            montant = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Montant invalide")
+
+        # nan / inf passent le test `<= 0` et produiraient un JSON invalide
+        if not math.isfinite(montant) or montant <= 0:
+            raise ValueError("Montant invalide")
+        return montant
+
+    @staticmethod
+    def quote(montant, from_currency, to_currency, snapshot=None):
+        snapshot = snapshot or RateCache.snapshot()
+
+        montant = QuoteService.parse_amount(montant)
+        taux = snapshot.get_rate(from_currency, to_currency)
+        if taux is None:
+            raise ValueError("Taux non défini pour cette paire.")
+
+        return {
+            "taux": taux,
+            "montant_converti": round(montant * taux, 2),
+        }
+
+    # --------------------------------------------------
+    # 🔐 JETON DE COTATION SIGNÉ
+    # --------------------------------------------------
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+    @staticmethod
+    def token_ttl():
+        return current_app.config.get(
+            "QUOTE_TOKEN_TTL_SECONDS",
+            QuoteService.DEFAULT_TOKEN_TTL
+        )
+
+    @staticmethod
+    def generate_token(montant, from_currency, to_currency, taux):
+        """
+        Jeton HMAC (itsdangerous) qui fige la cotation affichée :
+        paire, taux, montant et date d'expiration.
+        """
+        montant = float(montant)
+        payload = {
+            "from": from_currency,
+            "to": to_currency,
+            "taux": taux,
+            "montant": montant,
+            "montant_converti": round(montant * taux, 2),
+            "exp": int(time.time()) + QuoteService.token_ttl(),
+        }
+        return QuoteService._serializer().dumps(payload, salt=QuoteService.TOKEN_SALT)
+
+    @staticmethod
+    def verify_token(token):
+        """Retourne la cotation signée ou lève ValueError."""
+        try:
+            payload = QuoteService._serializer().loads(
+                token,
+                salt=QuoteService.TOKEN_SALT,
+                max_age=QuoteService.token_ttl()
+            )
+        except SignatureExpired:
+            raise ValueError("Cotation expirée, veuillez recalculer.")
+        except BadSignature:
+            raise ValueError("Cotation invalide.")
+
+        if payload.get("exp", 0) < time.time():
+            raise ValueError("Cotation expirée, veuillez recalculer.")
+        return payload
+
+    @staticmethod
+    def check_token(token, montant, from_currency, to_currency):
+        """
+        Vérifie que le jeton correspond bien à la demande
+        (même paire, même montant) et retourne la cotation signée.
+        """
+        quote = QuoteService.verify_token(token)
+
+        if quote["from"] != from_currency or quote["to"] != to_currency:
+            raise ValueError("Cotation invalide pour cette paire.")
+
+        if abs(float(montant) - quote["montant"]) > 0.005:
+            raise ValueError("Le montant ne correspond pas à la cotation.")
+
+        return quote
+
+    # --------------------------------------------------
+    # 🔹 COTATIONS GROUPÉES
+    # --------------------------------------------------
+    @staticmethod
+    def quote_batch(items, snapshot=None):
+        """
+        Calcule toutes les cotations sur la même photo des taux.
+        Les erreurs sont rapportées ligne par ligne, sans interrompre le lot.
+        """
+        snapshot = snapshot or RateCache.snapshot()
+        results = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({"index": index, "error": "Format invalide"})
+                continue
+
+            try:
+                quote = QuoteService.quote(
+                    item.get("montant"),
+                    item.get("from_currency"),
+                    item.get("to_currency"),
+                    snapshot=snapshot
+                )
+            except ValueError as e:
+                results.append({"index": index, "error": str(e)})
+                continue
+
+            results.append({
+                "index": index,
+                "from_currency": item.get("from_currency"),
+                "to_currency": item.get("to_currency"),
+                "montant": float(item.get("montant")),
+                **quote
+            })
+
+        return {
+            "version": snapshot.version,
+            "results": results,
+        }
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from flask import current_app
+
+from database import db
+from models import Rate, Parametre
+from services.rate_graph import RateGraph
+
+
+CachedRate = namedtuple("CachedRate", ["from_currency", "to_currency", "rate"])
+
+
+class RateSnapshot:
+    """
+    Photo immuable de la table `rate` à une version donnée.
+    Les objets CachedRate exposent `.rate` comme le modèle Rate,
+    les templates existants fonctionnent donc sans modification.
+
+    Les paires absentes de la table sont dérivées via RateGraph,
+    calculé une seule fois par version.
+    """
+
+    __slots__ = ("version", "rates", "graph", "loaded_at", "_table", "_etag")
+
+    def __init__(self, version, rates):
+        self.version = version
+        self.rates = MappingProxyType(rates)
+        self.graph = RateGraph({pair: r.rate for pair, r in rates.items()})
+        self.loaded_at = time.time()
+        self._table = None
+        self._etag = None
+
+    def get(self, from_currency, to_currency):
+        cached = self.rates.get((from_currency, to_currency))
+        if cached:
+            return cached
+
+        taux = self.graph.rate(from_currency, to_currency)
+        if taux is None:
+            return None
+        return CachedRate(from_currency, to_currency, taux)
+
+    def get_rate(self, from_currency, to_currency):
+        cached = self.rates.get((from_currency, to_currency))
+        if cached:
+            return cached.rate
+        return self.graph.rate(from_currency, to_currency)
+
+    def as_dict(self):
+        """
+        Table complète (paires directes + dérivées) sérialisable en JSON :
+        {"version": "...", "taux": {"CFA": {"GNF": 14.0}, ...}}
+        Calculée une seule fois par snapshot.
+        """
+        if self._table is None:
+            taux = {}
+            for from_currency in self.graph.currencies:
+                for to_currency in self.graph.currencies:
+                    rate = self.get_rate(from_currency, to_currency)
+                    if rate is not None:
+                        taux.setdefault(from_currency, {})[to_currency] = rate
+            self._table = {"version": self.version, "taux": taux}
+        return self._table
+
+    def etag(self):
+        """ETag fort : version + empreinte du contenu (robuste à un reset de la base)."""
+        if self._etag is None:
+            body = json.dumps(self.as_dict(), sort_keys=True).encode()
+            self._etag = f"taux-{self.version}-{hashlib.sha1(body).hexdigest()[:16]}"
+        return self._etag
+
+
+class RateCache:
+    """
+    Cache process-local des taux de change.
+
+    - toute la table `rate` est chargée en mémoire (RateSnapshot)
+    - la version est stockée dans Parametre(cle="rates_version")
+    - admin.gerer_taux incrémente la version à chaque mise à jour
+    - chaque worker relit la version au plus une fois par
+      RATE_CACHE_REFRESH_SECONDS et recharge si elle a changé
+    """
+
+    VERSION_KEY = "rates_version"
+    DEFAULT_REFRESH_SECONDS = 5
+
+    _snapshot = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    # --------------------------------------------------
+    # 📖 LECTURE
+    # --------------------------------------------------
+    @classmethod
+    def snapshot(cls) -> RateSnapshot:
+        snap = cls._snapshot
+        if snap is not None and time.monotonic() - cls._checked_at < cls._refresh_interval():
+            return snap
+
+        with cls._lock:
+            # Un autre thread a pu rafraîchir pendant l'attente du verrou
+            snap = cls._snapshot
+            if snap is not None and time.monotonic() - cls._checked_at < cls._refresh_interval():
+                return snap
+
+            version = cls._read_version()
+            if snap is None or snap.version != version:
+                snap = cls._load(version)
+                cls._snapshot = snap
+            cls._checked_at = time.monotonic()
+            return snap
+
+    @classmethod
+    def get(cls, from_currency, to_currency):
+        return cls.snapshot().get(from_currency, to_currency)
+
+    @classmethod
+    def get_rate(cls, from_currency, to_currency):
+        return cls.snapshot().get_rate(from_currency, to_currency)
+
+    # --------------------------------------------------
+    # 🔁 INVALIDATION
+    # --------------------------------------------------
+    @classmethod
+    def bump_version(cls):
+        """
+        Incrémente la version des taux.
+        À appeler dans la même transaction que la modification des Rate,
+        le commit reste à la charge de l'appelant.
+        """
+        version = Parametre.increment(cls.VERSION_KEY)
+        cls.invalidate()
+        return version
+
+    @classmethod
+    def invalidate(cls):
+        """Force une relecture de la version au prochain accès (worker courant)."""
+        cls._checked_at = 0.0
+
+    # --------------------------------------------------
+    # 🔧 INTERNE
+    # --------------------------------------------------
+    @staticmethod
+    def _refresh_interval():
+        return current_app.config.get(
+            "RATE_CACHE_REFRESH_SECONDS",
+            RateCache.DEFAULT_REFRESH_SECONDS
+        )
+
+    @classmethod
+    def _read_version(cls):
+        valeur = (
+            db.session.query(Parametre.valeur)
+            .filter_by(cle=cls.VERSION_KEY)
+            .scalar()
+        )
+        return valeur or "0"
+
+    @staticmethod
+    def _load(version) -> RateSnapshot:
+        rows = db.session.query(
+            Rate.from_currency,
+            Rate.to_currency,
+            Rate.rate
+        ).all()
+
+        rates = {
+            (r.from_currency, r.to_currency): CachedRate(r.from_currency, r.to_currency, r.rate)
+            for r in rows
+        }
+        return RateSnapshot(version, rates)
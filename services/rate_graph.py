@@ -0,0 +1,76 @@
+import math
+
+
+class RateGraph:
+    """
+    Matrice dense des taux entre toutes les devises connues.
+
+    Les paires absentes de la table `rate` sont dérivées par triangulation
+    (ex: XOF -> EUR -> GNF). Règle de choix du chemin :
+    1. le moins d'étapes possible (un taux direct gagne toujours)
+    2. à nombre d'étapes égal, le meilleur taux pour le client
+
+    La matrice est calculée une seule fois (Floyd-Warshall) à la construction ;
+    une cotation dérivée coûte ensuite une simple lecture d'index.
+    """
+
+    def __init__(self, rates):
+        """`rates` : dict {(from_currency, to_currency): taux}"""
+        currencies = sorted({c for pair in rates for c in pair})
+        self.currencies = currencies
+        self.index = {c: i for i, c in enumerate(currencies)}
+
+        n = len(currencies)
+        inf = math.inf
+
+        # Coût lexicographique : (nombre d'étapes, -log(taux))
+        hops = [[inf] * n for _ in range(n)]
+        cost = [[inf] * n for _ in range(n)]
+
+        for i in range(n):
+            hops[i][i] = 0
+            cost[i][i] = 0.0
+
+        for (from_currency, to_currency), taux in rates.items():
+            if not taux or taux <= 0 or from_currency == to_currency:
+                continue
+            i, j = self.index[from_currency], self.index[to_currency]
+            hops[i][j] = 1
+            cost[i][j] = -math.log(taux)
+
+        for k in range(n):
+            hops_k, cost_k = hops[k], cost[k]
+            for i in range(n):
+                h_ik = hops[i][k]
+                if h_ik == inf:
+                    continue
+                c_ik = cost[i][k]
+                hops_i, cost_i = hops[i], cost[i]
+                for j in range(n):
+                    h = h_ik + hops_k[j]
+                    if h < hops_i[j] or (h == hops_i[j] and c_ik + cost_k[j] < cost_i[j]):
+                        hops_i[j] = h
+                        cost_i[j] = c_ik + cost_k[j]
+
+        self.hops = hops
+        self.matrix = [
+            [math.exp(-cost[i][j]) if hops[i][j] != inf else None for j in range(n)]
+            for i in range(n)
+        ]
+
+    def rate(self, from_currency, to_currency):
+        if from_currency == to_currency:
+            return None
+
+        i = self.index.get(from_currency)
+        j = self.index.get(to_currency)
+        if i is None or j is None:
+            return None
+        return self.matrix[i][j]
+
+    def is_derived(self, from_currency, to_currency):
+        i = self.index.get(from_currency)
+        j = self.index.get(to_currency)
+        if i is None or j is None:
+            return False
+        return self.hops[i][j] not in (0, 1, math.inf)
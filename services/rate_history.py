@@ -0,0 +1,118 @@
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+from database import db
+from models import RateHistory
+from services.rate_cache import RateCache
+
+
+def _naive_utc(dt):
+    """Les colonnes DateTime(timezone=True) peuvent renvoyer des dates aware."""
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class RateHistoryIndex:
+    """
+    Index en mémoire de l'historique des taux.
+
+    Pour chaque paire : deux listes triées (dates d'effet, taux),
+    la recherche « as-of » est une bisection O(log n), sans SQL.
+    """
+
+    def __init__(self, rows):
+        pairs = {}
+        for from_currency, to_currency, rate, effective_from in rows:
+            pairs.setdefault((from_currency, to_currency), []).append(
+                (_naive_utc(effective_from), rate)
+            )
+
+        self._dates = {}
+        self._rates = {}
+        for pair, entries in pairs.items():
+            entries.sort(key=lambda e: e[0])
+            self._dates[pair] = [e[0] for e in entries]
+            self._rates[pair] = [e[1] for e in entries]
+
+    @classmethod
+    def load(cls):
+        rows = db.session.query(
+            RateHistory.from_currency,
+            RateHistory.to_currency,
+            RateHistory.rate,
+            RateHistory.effective_from
+        ).all()
+        return cls(rows)
+
+    def pairs(self):
+        return list(self._dates.keys())
+
+    def rate_at(self, from_currency, to_currency, when):
+        """
+        Taux en vigueur à la date `when`.
+        None si la paire est inconnue ou si `when` précède le premier taux connu.
+        """
+        pair = (from_currency, to_currency)
+        dates = self._dates.get(pair)
+        if not dates or when is None:
+            return None
+
+        pos = bisect_right(dates, _naive_utc(when)) - 1
+        if pos < 0:
+            return None
+        return self._rates[pair][pos]
+
+    def reprice(self, conversions):
+        """
+        Recalcule le montant converti de chaque conversion au taux
+        en vigueur à sa date. Renvoie une liste de tuples
+        (conversion, taux, montant_recalcule) ; taux=None si inconnu.
+        """
+        results = []
+        for c in conversions:
+            taux = self.rate_at(c.from_currency, c.to_currency, c.date_conversion)
+            montant = round(c.montant_initial * taux, 2) if taux is not None else None
+            results.append((c, taux, montant))
+        return results
+
+
+class RateHistoryService:
+    """
+    Écriture de l'historique + index partagé dans le worker,
+    reconstruit uniquement quand la version des taux change.
+    """
+
+    _index = None
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def record(from_currency, to_currency, rate, created_by=None, effective_from=None):
+        """Ajoute une entrée ; le commit reste à la charge de l'appelant."""
+        entry = RateHistory(
+            from_currency=from_currency,
+            to_currency=to_currency,
+            rate=rate,
+            created_by=created_by,
+            effective_from=effective_from or datetime.utcnow()
+        )
+        db.session.add(entry)
+        return entry
+
+    @classmethod
+    def index(cls) -> RateHistoryIndex:
+        version = RateCache.snapshot().version
+        if cls._index is not None and cls._version == version:
+            return cls._index
+
+        with cls._lock:
+            if cls._index is None or cls._version != version:
+                cls._index = RateHistoryIndex.load()
+                cls._version = version
+            return cls._index
+
+    @classmethod
+    def rate_at(cls, from_currency, to_currency, when):
+        return cls.index().rate_at(from_currency, to_currency, when)
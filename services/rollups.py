@@ -0,0 +1,263 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, literal_column
+
+from database import db
+from models import Transaction, Conversion, LedgerEntry, CompteSysteme, Parametre, Rollup
+from services.money import Money
+from services.rate_history import _naive_utc
+
+
+class RollupService:
+    """
+    Agrégats count / volume par tranche de temps (minute, heure, jour),
+    par (fournisseur, devise, statut), pour transaction, conversion et
+    ledger_entry.
+
+    Maintenus par un job (run_rollups.py) qui suit un watermark par source :
+    chaque passage ne recalcule que les tranches à partir de
+    `watermark - ROLLUP_LATE_WINDOW_HOURS` (arrondi au jour), ce qui rattrape
+    les changements de statut tardifs sans relire tout l'historique.
+
+    Un graphique sur 30 jours lit quelques centaines de lignes `rollup`
+    au lieu de balayer les tables sources.
+    """
+
+    GRANULARITIES = {
+        "minute": timedelta(minutes=1),
+        "hour": timedelta(hours=1),
+        "day": timedelta(days=1),
+    }
+
+    # Troncature SQLite (strftime) équivalente à date_trunc PostgreSQL
+    SQLITE_FORMATS = {
+        "minute": "%Y-%m-%d %H:%M:00",
+        "hour": "%Y-%m-%d %H:00:00",
+        "day": "%Y-%m-%d 00:00:00",
+    }
+
+    SOURCES = ("transaction", "conversion", "ledger")
+    DIMENSIONS = ("fournisseur", "devise", "statut")
+
+    WATERMARK_KEY = "rollup_watermark_{}"
+    DEFAULT_LATE_WINDOW_HOURS = 24
+    MAX_BUCKETS = 2000
+
+    # --------------------------------------------------
+    # 🔁 JOB INCRÉMENTAL
+    # --------------------------------------------------
+    @classmethod
+    def run(cls, now=None):
+        """
+        Met à jour les agrégats de toutes les sources.
+        Le commit reste à la charge de l'appelant.
+        Retourne {source: début de la fenêtre recalculée (None = tout)}.
+        """
+        now = now or datetime.utcnow()
+        late = timedelta(hours=current_app.config.get(
+            "ROLLUP_LATE_WINDOW_HOURS", cls.DEFAULT_LATE_WINDOW_HOURS
+        ))
+
+        refreshed = {}
+        for source in cls.SOURCES:
+            watermark = cls.watermark(source)
+            start = cls.floor(watermark - late, "day") if watermark else None
+
+            for granularity in cls.GRANULARITIES:
+                cls._refresh(source, granularity, start)
+
+            cls._set_watermark(source, now)
+            refreshed[source] = start
+
+        return refreshed
+
+    @classmethod
+    def watermark(cls, source):
+        param = Parametre.query.filter_by(cle=cls.WATERMARK_KEY.format(source)).first()
+        if not param or not param.valeur:
+            return None
+        return datetime.fromisoformat(param.valeur)
+
+    @classmethod
+    def _set_watermark(cls, source, value):
+        key = cls.WATERMARK_KEY.format(source)
+        param = Parametre.query.filter_by(cle=key).first()
+        if not param:
+            param = Parametre(cle=key)
+            db.session.add(param)
+        param.valeur = value.isoformat()
+
+    @classmethod
+    def _refresh(cls, source, granularity, start):
+        """Remplace les tranches >= start par un GROUP BY sur la source."""
+        delete = Rollup.query.filter(
+            Rollup.source == source,
+            Rollup.granularity == granularity
+        )
+        if start is not None:
+            delete = delete.filter(Rollup.bucket_start >= start)
+        delete.delete(synchronize_session=False)
+
+        for row in cls._aggregate(source, granularity, start):
+            db.session.add(Rollup(
+                source=source,
+                granularity=granularity,
+                bucket_start=cls._as_datetime(row.bucket),
+                fournisseur=row.fournisseur or "",
+                devise=row.devise or "",
+                statut=row.statut or "",
+                count=row.count,
+                volume_minor=int(row.volume_minor or 0),
+            ))
+        db.session.flush()
+
+    @classmethod
+    def _aggregate(cls, source, granularity, start):
+        if source == "transaction":
+            time_col = Transaction.date_transaction
+            keys = [
+                Transaction.fournisseur,
+                Transaction.devise,
+                Transaction.statut,
+            ]
+            volume = Transaction.montant_minor
+            query = db.session.query(Transaction)
+        elif source == "conversion":
+            # Le fournisseur d'une conversion est celui de son compte système
+            time_col = Conversion.date_conversion
+            keys = [CompteSysteme.fournisseur, Conversion.from_currency, Conversion.statut]
+            volume = Conversion.montant_initial_minor
+            query = db.session.query(Conversion).outerjoin(
+                CompteSysteme, Conversion.compte_systeme_id == CompteSysteme.id
+            )
+        elif source == "ledger":
+            time_col = LedgerEntry.created_at
+            keys = [LedgerEntry.provider, LedgerEntry.devise, LedgerEntry.sens]
+            volume = LedgerEntry.montant_minor
+            query = db.session.query(LedgerEntry)
+        else:
+            raise ValueError(f"Source inconnue : {source}")
+
+        bucket = cls._bucket_expr(time_col, granularity)
+        keys = [func.coalesce(k, "") for k in keys]
+        group = [bucket] + keys
+
+        query = query.with_entities(
+            bucket.label("bucket"),
+            keys[0].label("fournisseur"),
+            keys[1].label("devise"),
+            keys[2].label("statut"),
+            func.count().label("count"),
+            func.coalesce(func.sum(volume), 0).label("volume_minor"),
+        ).filter(time_col.isnot(None))
+
+        if start is not None:
+            query = query.filter(time_col >= start)
+
+        return query.group_by(*group).all()
+
+    @classmethod
+    def _bucket_expr(cls, column, granularity):
+        # Constantes inlinées : PostgreSQL exige la même expression dans le
+        # SELECT et le GROUP BY (deux paramètres liés seraient distincts)
+        if db.engine.dialect.name == "postgresql":
+            return func.date_trunc(literal_column(f"'{granularity}'"), column)
+        return func.strftime(literal_column(f"'{cls.SQLITE_FORMATS[granularity]}'"), column)
+
+    @staticmethod
+    def _as_datetime(value):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return _naive_utc(value)
+
+    @staticmethod
+    def floor(dt, granularity):
+        if granularity == "day":
+            return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        if granularity == "hour":
+            return dt.replace(minute=0, second=0, microsecond=0)
+        return dt.replace(second=0, microsecond=0)
+
+    # --------------------------------------------------
+    # 📊 REQUÊTES PAR PLAGE
+    # --------------------------------------------------
+    @classmethod
+    def pick_granularity(cls, start, end):
+        span = end - start
+        if span <= timedelta(hours=6):
+            return "minute"
+        if span <= timedelta(days=7):
+            return "hour"
+        return "day"
+
+    @classmethod
+    def series(cls, source, start, end, granularity=None, group_by=(), **filters):
+        """
+        Série temporelle [start, end) lue uniquement dans `rollup`.
+
+        - granularity : minute / hour / day (choisie selon la plage si absente)
+        - group_by    : sous-ensemble de DIMENSIONS conservé dans chaque point
+        - filters     : fournisseur=…, devise=…, statut=…
+        """
+        if source not in cls.SOURCES:
+            raise ValueError(f"Source inconnue : {source}")
+
+        # Bornes aware (…+00:00) ou naïves : tout en UTC naïf avant comparaison
+        start, end = cls._as_datetime(start), cls._as_datetime(end)
+        if end <= start:
+            raise ValueError("Plage de dates invalide")
+
+        granularity = granularity or cls.pick_granularity(start, end)
+        if granularity not in cls.GRANULARITIES:
+            raise ValueError(f"Granularité inconnue : {granularity}")
+        if (end - start) / cls.GRANULARITIES[granularity] > cls.MAX_BUCKETS:
+            raise ValueError("Plage trop longue pour cette granularité")
+
+        group_by = [d for d in group_by if d in cls.DIMENSIONS]
+        dims = [getattr(Rollup, d) for d in group_by]
+
+        query = db.session.query(
+            Rollup.bucket_start,
+            *dims,
+            func.sum(Rollup.count),
+            func.sum(Rollup.volume_minor),
+        ).filter(
+            Rollup.source == source,
+            Rollup.granularity == granularity,
+            Rollup.bucket_start >= cls.floor(start, granularity),
+            Rollup.bucket_start < end,
+        )
+
+        for dim, value in filters.items():
+            if dim in cls.DIMENSIONS and value is not None:
+                query = query.filter(getattr(Rollup, dim) == value)
+
+        rows = (
+            query
+            .group_by(Rollup.bucket_start, *dims)
+            .order_by(Rollup.bucket_start, *dims)
+            .all()
+        )
+
+        points = []
+        for row in rows:
+            point = {"bucket": row[0].isoformat()}
+            point.update(zip(group_by, row[1:1 + len(dims)]))
+            count, volume_minor = row[-2], int(row[-1] or 0)
+
+            # Le volume n'est convertible que si la devise est connue
+            devise = point.get("devise") or filters.get("devise")
+
+            point["count"] = int(count or 0)
+            point["volume_minor"] = volume_minor
+            point["volume"] = Money.from_minor(volume_minor, devise) if devise else None
+            points.append(point)
+
+        return {
+            "source": source,
+            "granularity": granularity,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "points": points,
+        }
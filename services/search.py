@@ -0,0 +1,121 @@
+import logging
+
+from sqlalchemy import or_, text, literal_column, bindparam
+
+from database import db
+from models import Conversion
+
+
+logger = logging.getLogger("africachange.search")
+
+
+class ConversionSearch:
+    """
+    Recherche par sous-chaîne dans l'historique des conversions
+    (référence, devises, téléphones) servie par un index trigramme :
+
+    - PostgreSQL : index GIN `gin_trgm_ops` (extension pg_trgm) sur
+      l'expression SEARCH_DOCUMENT, créé par la migration
+    - SQLite : table FTS5 `conversion_search` (tokenizer trigram) tenue à
+      jour par triggers, créés par la migration e4b8c2f6a1d3
+    - sinon (ou terme de moins de 3 caractères) : LIKE classique
+
+    Un LIKE '%terme%' ne peut utiliser aucun index B-tree : sans trigrammes,
+    chaque frappe relit toute la table.
+    """
+
+    COLUMNS = ("reference", "from_currency", "to_currency", "sender_phone", "receiver_phone")
+
+    # Doit rester identique à l'expression de l'index ix_conversion_search_trgm
+    # (littéraux inlinés : un paramètre lié empêcherait l'usage de l'index)
+    SEARCH_DOCUMENT = "lower(" + " || ' ' || ".join(
+        f"coalesce(conversion.{column}, '')" for column in COLUMNS
+    ) + ")"
+
+    PG_INDEX = "ix_conversion_search_trgm"
+    FTS_TABLE = "conversion_search"
+    FTS_TRIGGERS = ("conversion_search_ai", "conversion_search_ad", "conversion_search_au")
+
+    MIN_TRIGRAM_LENGTH = 3
+
+    # url moteur -> "trigram" | "fts5" | "like"
+    _backends = {}
+
+    # --------------------------------------------------
+    # 🔎 FILTRE
+    # --------------------------------------------------
+    @classmethod
+    def apply(cls, query, term):
+        """Ajoute le filtre de recherche `term` à une requête sur Conversion."""
+        term = (term or "").strip()
+        if not term:
+            return query
+
+        backend = cls.backend() if len(term) >= cls.MIN_TRIGRAM_LENGTH else "like"
+
+        if backend == "trigram":
+            return query.filter(
+                literal_column(cls.SEARCH_DOCUMENT).like(
+                    f"%{cls._escape(term.lower())}%", escape="\\"
+                )
+            )
+
+        if backend == "fts5":
+            # Phrase entre guillemets : le terme est cherché tel quel (sous-chaîne)
+            phrase = '"' + term.replace('"', '""') + '"'
+            matches = text(
+                f"SELECT rowid FROM {cls.FTS_TABLE} WHERE {cls.FTS_TABLE} MATCH :phrase"
+            ).bindparams(phrase=phrase)
+            return query.filter(Conversion.id.in_(matches))
+
+        like = f"%{cls._escape(term)}%"
+        return query.filter(
+            or_(*[getattr(Conversion, column).like(like, escape="\\") for column in cls.COLUMNS])
+        )
+
+    @staticmethod
+    def _escape(term):
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    # --------------------------------------------------
+    # ⚙️ BACKEND
+    # --------------------------------------------------
+    @classmethod
+    def backend(cls):
+        key = str(db.engine.url)
+        if key not in cls._backends:
+            cls._backends[key] = cls._detect()
+        return cls._backends[key]
+
+    @classmethod
+    def _detect(cls):
+        dialect = db.engine.dialect.name
+
+        if dialect == "postgresql":
+            with db.engine.connect() as conn:
+                found = conn.execute(
+                    text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+                    {"name": cls.PG_INDEX}
+                ).first()
+            if found:
+                return "trigram"
+            logger.warning("Index %s absent (alembic upgrade) : recherche par LIKE", cls.PG_INDEX)
+            return "like"
+
+        if dialect == "sqlite":
+            names = [cls.FTS_TABLE, *cls.FTS_TRIGGERS]
+            with db.engine.connect() as conn:
+                found = conn.execute(
+                    text("SELECT count(*) FROM sqlite_master WHERE name IN :names").bindparams(
+                        bindparam("names", expanding=True)
+                    ),
+                    {"names": names}
+                ).scalar()
+            if found == len(names):
+                return "fts5"
+            # Table absente, ou triggers perdus (recréation de `conversion`) :
+            # l'index ne serait plus à jour
+            logger.warning("Table %s ou triggers absents (alembic upgrade) : recherche par LIKE", cls.FTS_TABLE)
+            return "like"
+
+        return "like"
@@ -0,0 +1,234 @@
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, insert, update
+
+from database import db
+from models import Transaction, Conversion, StatCounter
+from services.money import Money
+
+
+class StatCounters:
+    """
+    Compteurs par statut maintenus de façon incrémentale.
+
+    Un hook `before_flush` sur la session calcule les deltas
+    (créations, changements de statut/montant, suppressions), `after_flush`
+    les applique à `stat_counter` sur la même connexion : les compteurs sont
+    commités ou annulés avec la modification elle-même, quel que soit
+    l'appelant (PaymentService, callbacks, AdminActions, scripts…).
+
+    La lecture du tableau de bord devient O(1) quelle que soit la volumétrie.
+    """
+
+    # scope -> (modèle, attribut montant ou None)
+    # Le volume est cumulé en unités mineures de la devise de chaque ligne.
+    SCOPES = {
+        "transaction": (Transaction, "montant"),
+        "conversion": (Conversion, None),
+    }
+
+    INFO_KEY = "stat_counter_deltas"
+
+    _installed = False
+
+    # --------------------------------------------------
+    # 🔌 INSTALLATION
+    # --------------------------------------------------
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+
+        # Charger l'ancienne valeur même si l'attribut est expiré (après commit),
+        # sinon un changement de statut serait invisible dans l'historique.
+        for model, amount_attr in cls.SCOPES.values():
+            for attr in ("statut", amount_attr):
+                if attr:
+                    event.listen(getattr(model, attr), "set", cls._noop, active_history=True)
+
+        event.listen(db.session, "before_flush", cls._before_flush)
+        event.listen(db.session, "after_flush", cls._after_flush)
+        cls._installed = True
+
+    # --------------------------------------------------
+    # 📖 LECTURE
+    # --------------------------------------------------
+    @staticmethod
+    def read():
+        """{scope: {statut: {"count": n, "volume_minor": v}}}"""
+        result = {scope: {} for scope in StatCounters.SCOPES}
+        rows = db.session.query(
+            StatCounter.scope,
+            StatCounter.statut,
+            StatCounter.count,
+            StatCounter.volume_minor
+        ).all()
+
+        for scope, statut, count, volume in rows:
+            result.setdefault(scope, {})[statut] = {
+                "count": count,
+                "volume_minor": volume,
+            }
+        return result
+
+    # --------------------------------------------------
+    # 🔁 RECONSTRUCTION COMPLÈTE
+    # --------------------------------------------------
+    @staticmethod
+    def rebuild():
+        """
+        Recalcule tous les compteurs depuis les tables sources.
+        Le commit reste à la charge de l'appelant.
+        """
+        if db.engine.dialect.name == "postgresql":
+            # Bloque les écritures concurrentes le temps du recalcul
+            db.session.execute(db.text(
+                'LOCK TABLE "transaction", conversion IN SHARE MODE'
+            ))
+
+        db.session.query(StatCounter).delete()
+
+        for scope, (model, amount_attr) in StatCounters.SCOPES.items():
+            # Même objet dans SELECT et GROUP BY : un seul paramètre lié
+            # (psycopg 3 lie les paramètres côté serveur)
+            statut = func.coalesce(model.statut, "")
+            columns = [statut, func.count(model.id)]
+            if amount_attr:
+                # somme exacte sur la colonne entière *_minor
+                columns.append(func.coalesce(func.sum(getattr(model, f"{amount_attr}_minor")), 0))
+
+            rows = db.session.query(*columns).group_by(statut).all()
+            for row in rows:
+                db.session.add(StatCounter(
+                    scope=scope,
+                    statut=row[0],
+                    count=row[1],
+                    volume_minor=int(row[2]) if amount_attr else 0
+                ))
+
+    # --------------------------------------------------
+    # 🔧 INTERNE
+    # --------------------------------------------------
+    @staticmethod
+    def _noop(target, value, oldvalue, initiator):
+        return value
+
+    @staticmethod
+    def _minor(value, obj):
+        # Même conversion que la colonne *_minor sommée par rebuild()
+        return Money.to_minor(value or 0, getattr(obj, "devise", None))
+
+    @staticmethod
+    def _current_statut(obj):
+        if obj.statut is not None:
+            return obj.statut
+        # Nouvel objet : le défaut de colonne n'est appliqué qu'à l'INSERT
+        default = type(obj).__table__.c.statut.default
+        return default.arg if default is not None and not callable(default.arg) else ""
+
+    @staticmethod
+    def _previous(obj, attr):
+        """Valeur avant modification (historique SQLAlchemy)."""
+        history = inspect(obj).attrs[attr].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(obj, attr)
+
+    @staticmethod
+    def _collect(session):
+        deltas = {}
+
+        def add(scope, statut, count, volume):
+            key = (scope, statut or "")
+            c, v = deltas.get(key, (0, 0))
+            deltas[key] = (c + count, v + volume)
+
+        minor = StatCounters._minor
+        previous = StatCounters._previous
+
+        for scope, (model, amount_attr) in StatCounters.SCOPES.items():
+            for obj in session.new:
+                if isinstance(obj, model):
+                    amount = minor(getattr(obj, amount_attr), obj) if amount_attr else 0
+                    add(scope, StatCounters._current_statut(obj), 1, amount)
+
+            for obj in session.deleted:
+                if isinstance(obj, model):
+                    amount = minor(previous(obj, amount_attr), obj) if amount_attr else 0
+                    add(scope, previous(obj, "statut"), -1, -amount)
+
+            for obj in session.dirty:
+                if not isinstance(obj, model) or obj in session.deleted:
+                    continue
+
+                old_statut = previous(obj, "statut") or ""
+                new_statut = obj.statut or ""
+                old_amount = minor(previous(obj, amount_attr), obj) if amount_attr else 0
+                new_amount = minor(getattr(obj, amount_attr), obj) if amount_attr else 0
+
+                if old_statut == new_statut and old_amount == new_amount:
+                    continue
+
+                add(scope, old_statut, -1, -old_amount)
+                add(scope, new_statut, 1, new_amount)
+
+        return {k: v for k, v in deltas.items() if v != (0, 0)}
+
+    @staticmethod
+    def _before_flush(session, flush_context, instances):
+        # Calculé avant le flush : les lignes supprimées sont encore lisibles
+        session.info[StatCounters.INFO_KEY] = StatCounters._collect(session)
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        deltas = session.info.pop(StatCounters.INFO_KEY, None)
+        if not deltas:
+            return
+
+        connection = session.connection()
+        table = StatCounter.__table__
+        now = datetime.utcnow()
+
+        for (scope, statut), (count, volume) in sorted(deltas.items()):
+            StatCounters._apply(connection, table, scope, statut, count, volume, now)
+
+    @staticmethod
+    def _apply(connection, table, scope, statut, count, volume, now):
+        dialect = connection.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            stmt = dialect_insert(table).values(
+                scope=scope, statut=statut,
+                count=count, volume_minor=volume, updated_at=now
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["scope", "statut"],
+                set_={
+                    "count": table.c.count + count,
+                    "volume_minor": table.c.volume_minor + volume,
+                    "updated_at": now,
+                }
+            )
+            connection.execute(stmt)
+            return
+
+        # Autres moteurs : UPDATE puis INSERT si la ligne n'existe pas encore
+        result = connection.execute(
+            update(table)
+            .where(table.c.scope == scope, table.c.statut == statut)
+            .values(
+                count=table.c.count + count,
+                volume_minor=table.c.volume_minor + volume,
+                updated_at=now
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(
+                scope=scope, statut=statut,
+                count=count, volume_minor=volume, updated_at=now
+            ))
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from services.local_store import LocalStore
+
+
+logger = logging.getLogger("africachange.tokens")
+
+
+class TokenCache:
+    """
+    Jetons OAuth (client_credentials) partagés par tous les workers.
+
+    1. cache mémoire du worker
+    2. LocalStore (fichier SQLite commun aux workers de la machine)
+    3. sinon un seul appel au serveur OAuth (verrou inter-processus) : une
+       rafale de paiements déclenche une seule demande de jeton, les autres
+       relisent le jeton obtenu
+
+    Un jeton est renouvelé TOKEN_REFRESH_MARGIN_SECONDS avant son expiration.
+    """
+
+    DEFAULT_MARGIN = 60
+    DEFAULT_EXPIRES_IN = 3600
+
+    _memory = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, fetch):
+        """
+        `key` : identifiant stable (ex. url OAuth + client_id)
+        `fetch()` : appelle le serveur OAuth et retourne sa réponse JSON
+        ({"access_token": ..., "expires_in": ...}) ; ses exceptions remontent.
+        """
+        key = cls._key(key)
+
+        token = cls._fresh(cls._memory.get(key))
+        if token:
+            return token
+
+        token = cls._from_store(key)
+        if token:
+            return token
+
+        with LocalStore.lock(f"token_{key}"):
+            # Un autre worker a pu renouveler le jeton pendant l'attente
+            token = cls._from_store(key)
+            if token:
+                return token
+
+            data = fetch()
+            token = data["access_token"]
+            expires_in = int(data.get("expires_in") or cls.DEFAULT_EXPIRES_IN)
+
+            # Jeton très court : on garde au moins la moitié de sa durée
+            margin = current_app.config.get("TOKEN_REFRESH_MARGIN_SECONDS", cls.DEFAULT_MARGIN)
+            margin = min(margin, expires_in // 2)
+            entry = {"token": token, "refresh_at": time.time() + expires_in - margin}
+
+            LocalStore.set(f"token:{key}", entry, ttl=expires_in)
+            with cls._lock:
+                cls._memory[key] = entry
+
+            logger.info("Jeton OAuth renouvelé (%s), valable %ss", key[:8], expires_in)
+            return token
+
+    @classmethod
+    def invalidate(cls, key, token=None):
+        """
+        À appeler si le fournisseur rejette le jeton (401).
+        Avec `token` : seul ce jeton est retiré ; un jeton déjà renouvelé
+        par un autre worker est conservé.
+        """
+        key = cls._key(key)
+        with LocalStore.lock(f"token_{key}"):
+            entry = LocalStore.get(f"token:{key}")
+            if token is None or (entry and entry["token"] == token):
+                LocalStore.delete(f"token:{key}")
+            with cls._lock:
+                entry = cls._memory.get(key)
+                if token is None or (entry and entry["token"] == token):
+                    cls._memory.pop(key, None)
+
+    @classmethod
+    def authorized(cls, key, get_token, send):
+        """
+        `send(token)` envoie l'appel et retourne la réponse HTTP.
+        Sur 401 (jeton révoqué avant son expiration), le jeton est invalidé
+        pour tous les workers et l'appel rejoué une seule fois avec un jeton
+        neuf. Un 401 est un refus avant traitement : rejeu sans risque,
+        même pour un POST de paiement.
+        """
+        token = get_token()
+        response = send(token)
+        if response.status_code != 401:
+            return response
+
+        logger.warning("Jeton OAuth rejeté (%s), renouvellement", cls._key(key)[:8])
+        cls.invalidate(key, token)
+
+        token = get_token()
+        if not token:
+            return response
+        return send(token)
+
+    # --------------------------------------------------
+    # 🔎 INTERNE
+    # --------------------------------------------------
+    @staticmethod
+    def _key(key):
+        # Le client_id ne doit pas apparaître en clair dans le fichier partagé
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _fresh(entry):
+        if entry and entry["refresh_at"] > time.time():
+            return entry["token"]
+        return None
+
+    @classmethod
+    def _from_store(cls, key):
+        entry = LocalStore.get(f"token:{key}")
+        token = cls._fresh(entry)
+        if token:
+            with cls._lock:
+                cls._memory[key] = entry
+        return token
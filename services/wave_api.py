@@ -1,7 +1,8 @@
 import os
-import requests
 import uuid
 
+from services.http_client import ProviderHTTP
+
 class WaveAPI:
     def __init__(self):
         self.api_key = os.getenv("WAVE_API_KEY")
@@ -28,7 +29,7 @@ class WaveAPI:
         }
 
         try:
-            response = requests.post(self.api_url, headers=headers, json=payload)
+            response = ProviderHTTP.post(self.api_url, headers=headers, json=payload)
             if response.status_code == 200:
                 data = response.json()
                 return {
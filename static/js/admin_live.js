@@ -1,32 +1,77 @@
 let lastUpdate = 0;
 
-async function refreshAdminStats() {
-  try {
-    const res = await fetch("/admin/realtime/stats");
-    if (!res.ok) return;
+// Repli si EventSource est indisponible ou coupé durablement
+const POLL_INTERVAL = 7000;
+let pollTimer = null;
+
+function setText(id, value) {
+  const el = document.getElementById(id);
+  if (el && value !== undefined && value !== null) el.innerText = value;
+}
 
-    const data = await res.json();
+function renderAdminStats(data) {
+  // Transactions
+  setText("stat-pending", data.transactions.pending);
+  setText("stat-blocked", data.transactions.blocked);
+  setText("stat-success", data.transactions.success);
+  setText("stat-failed", data.transactions.failed);
+  setText("stat-total", data.transactions.total);
 
-    // Transactions
-    document.getElementById("stat-pending").innerText = data.transactions.pending;
-    document.getElementById("stat-blocked").innerText = data.transactions.blocked;
-    document.getElementById("stat-success").innerText = data.transactions.success;
+  // Conversions
+  if (data.conversions) setText("stat-conv-pending", data.conversions.pending);
 
-    // Volume
-    document.getElementById("stat-volume").innerText =
-      data.volume.total.toLocaleString() + " FCFA";
+  // Volume
+  setText("stat-volume", data.volume.total.toLocaleString() + " FCFA");
 
-    // Alerts
-    document.getElementById("stat-risks").innerText = data.risks.alerts;
+  // Alerts
+  setText("stat-risks", data.risks.alerts);
+
+  lastUpdate = Date.now();
+}
+
+async function refreshAdminStats() {
+  try {
+    const res = await fetch("/admin/realtime/stats");
+    if (!res.ok) return;
 
-    lastUpdate = Date.now();
+    renderAdminStats(await res.json());
   } catch (e) {
     console.error("Admin realtime error", e);
   }
 }
 
-// Toutes les 7 secondes (équilibre charge / réactivité)
-setInterval(refreshAdminStats, 7000);
+function startPolling() {
+  if (pollTimer) return;
+  refreshAdminStats();
+  pollTimer = setInterval(refreshAdminStats, POLL_INTERVAL);
+}
+
+function stopPolling() {
+  if (!pollTimer) return;
+  clearInterval(pollTimer);
+  pollTimer = null;
+}
+
+function startAdminStream() {
+  // Flux servi seulement si le processus `stream` est déployé
+  if (!window.SSE_STREAMS_ENABLED || !window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  const source = new EventSource("/admin/realtime/stream");
+
+  // Le serveur ne pousse que lorsqu'une valeur change
+  source.addEventListener("stats", (event) => {
+    stopPolling();
+    renderAdminStats(JSON.parse(event.data));
+  });
+
+  source.onerror = () => {
+    // EventSource se reconnecte seul (retry) ; CLOSED = refus définitif
+    // (403, ou 204 quand le flux est désactivé / complet sur ce worker)
+    if (source.readyState === EventSource.CLOSED) startPolling();
+  };
+}
 
-// Chargement initial
-refreshAdminStats();
+startAdminStream();
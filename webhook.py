@@ -1,5 +1,5 @@
 from flask import Blueprint, request
-import requests
+from services.http_client import ProviderHTTP
 
 webhook_bp = Blueprint("webhook", __name__)
 
@@ -73,4 +73,4 @@ def envoyer_message(numero, texte):
         }
     }
 
-    requests.post(url, headers=headers, json=data)
\ No newline at end of file
+    ProviderHTTP.post(url, headers=headers, json=data)
\ No newline at end of file